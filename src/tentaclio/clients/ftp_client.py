@@ -2,6 +2,7 @@
 import ftplib
 import io
 import logging
+import shutil
 import stat
 from typing import Iterable, Optional, Union
 
@@ -196,7 +197,7 @@ class SFTPClient(base_client.BaseClient["SFTPClient"]):
         # self.conn.putfo(remote_path, file_obj.read())
         # but open works
         with self.conn.open(remote_path, mode="wb") as f:
-            f.write(reader.read())
+            shutil.copyfileobj(reader, f)
 
     def scandir(self, **kwargs) -> Iterable[fs.DirEntry]:
         """Scan the connection url to create dir entries."""
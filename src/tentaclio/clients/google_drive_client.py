@@ -1,18 +1,27 @@
 """Google drive client."""
 import abc
+import collections
+import dataclasses
+import datetime
 import functools
 import json
 import logging
 import mimetypes
 import os
 import platform
+import sys
+import threading
+import time
+from concurrent import futures
 from dataclasses import dataclass
 from typing import Any, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar, Union
 
-from apiclient.http import MediaIoBaseDownload, MediaIoBaseUpload
+from apiclient.http import MediaIoBaseDownload, MediaIoBaseUpload, build_http
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 
 from tentaclio import fs, protocols, urls
 
@@ -53,8 +62,22 @@ GOOGLE_CREDENTIALS_ENTRIES = {
     "token_uri",
     "refresh_token",
     "scopes",
+    "expiry",
 }
 
+# Size of the byte ranges requested while downloading media.
+# Google recommends multiples of 256 KiB for chunked transfers.
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Number of drive roots resolved concurrently while listing drives.
+DRIVE_ROOT_WORKERS = 8
+
+# Maximum number of path parts looked up in a single query.
+MAX_QUERY_PARTS = 100
+
+# Number of threads prefetching the next page of listings.
+PREFETCH_WORKERS = 4
+
 # Generic type
 T = TypeVar("T")
 
@@ -62,17 +85,31 @@ T = TypeVar("T")
 # Credentials management
 
 
+# token file -> (modification time, credentials)
+_CREDENTIALS_CACHE: Dict[str, Tuple[float, Credentials]] = {}
+
+# Serializes loading, refreshing and saving the credentials, so clients started at the same
+# time don't refresh the token or rewrite the token file concurrently.
+_CREDENTIALS_LOCK = threading.Lock()
+
+
 def _load_credentials(token_file: str) -> Credentials:
-    """Load the credentials and refresh them if necesary."""
-    creds = None
-    if os.path.exists(token_file):
-        with open(token_file) as f:
-            state = json.load(f)
-            state = {key: state[key] for key in state if key in GOOGLE_CREDENTIALS_ENTRIES}
-            creds = Credentials(**state)
-    else:
+    """Load the credentials and refresh them if necesary.
+
+    Credentials are cached while the token file doesn't change.
+    """
+    try:
+        # a single stat both checks the file exists and tells if the cache is stale
+        mtime = os.stat(token_file).st_mtime
+    except OSError:
         raise ValueError(f"Token file is not valid {token_file}")
 
+    cached = _CREDENTIALS_CACHE.get(token_file)
+    if cached is not None and cached[0] == mtime:
+        creds = cached[1]
+    else:
+        creds = _read_credentials(token_file)
+
     # If there are no (valid) credentials available refresh them or raise an error.
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
@@ -80,38 +117,337 @@ def _load_credentials(token_file: str) -> Credentials:
         else:
             raise ValueError(f"Couldn't refresh token in f{token_file}")
         # Save the credentials for the next run
-        with open(token_file, "w") as f:
-            f.write(creds.to_json())
+        _save_credentials(token_file, creds)
+    else:
+        _CREDENTIALS_CACHE[token_file] = (mtime, creds)
+
+    _schedule_refresh(token_file, creds)
     return creds
 
 
+def _read_credentials(token_file: str) -> Credentials:
+    """Read the credentials from the token file."""
+    with open(token_file) as f:
+        state = json.load(f)
+    state = {key: state[key] for key in state if key in GOOGLE_CREDENTIALS_ENTRIES}
+    if "expiry" in state:
+        state["expiry"] = _parse_expiry(state["expiry"])
+    return Credentials(**state)
+
+
+def _parse_expiry(value: Any) -> Optional[datetime.datetime]:
+    """Parse the expiry written by google-auth, a naive utc datetime in iso format."""
+    try:
+        return datetime.datetime.strptime(value.rstrip("Z").split(".")[0], "%Y-%m-%dT%H:%M:%S")
+    except (AttributeError, ValueError):
+        return None
+
+
+def _save_credentials(token_file: str, creds: Credentials) -> None:
+    """Write the credentials to the token file keeping the cache up to date."""
+    with open(token_file, "w") as f:
+        f.write(creds.to_json())
+    _CREDENTIALS_CACHE[token_file] = (os.path.getmtime(token_file), creds)
+
+
+# Refresh the credentials this many seconds before they expire.
+TOKEN_REFRESH_MARGIN = 5 * 60
+
+# token file -> (credentials, timer refreshing them in the background)
+_REFRESH_TIMERS: Dict[str, Tuple[Credentials, threading.Timer]] = {}
+_REFRESH_TIMERS_LOCK = threading.Lock()
+
+
+def _schedule_refresh(token_file: str, creds: Credentials) -> None:
+    """Refresh the credentials in the background shortly before they expire.
+
+    This way requests don't have to wait for the token exchange. Only one refresh
+    is scheduled per token file, the refresh of credentials read from an older version of
+    the token file is replaced.
+    """
+    if not isinstance(creds.expiry, datetime.datetime) or not creds.refresh_token:
+        return
+    # google-auth expiry dates are naive utc datetimes
+    expires_in = (creds.expiry - datetime.datetime.utcnow()).total_seconds()
+    delay = expires_in - TOKEN_REFRESH_MARGIN
+    if delay <= 0:
+        return
+
+    with _REFRESH_TIMERS_LOCK:
+        scheduled = _REFRESH_TIMERS.get(token_file)
+        if scheduled is not None:
+            scheduled_creds, timer = scheduled
+            if scheduled_creds is creds and timer.is_alive():
+                return
+            timer.cancel()
+        timer = threading.Timer(delay, _refresh_in_background, args=(token_file, creds))
+        timer.daemon = True
+        _REFRESH_TIMERS[token_file] = (creds, timer)
+        timer.start()
+
+
+def _refresh_in_background(token_file: str, creds: Credentials) -> None:
+    with _REFRESH_TIMERS_LOCK:
+        scheduled = _REFRESH_TIMERS.get(token_file)
+        if scheduled is not None and scheduled[0] is creds:
+            del _REFRESH_TIMERS[token_file]
+    try:
+        with _CREDENTIALS_LOCK:
+            if _is_token_file_replaced(token_file, creds):
+                # don't overwrite the credentials of a new authentication
+                return
+            creds.refresh(Request())
+            _save_credentials(token_file, creds)
+    except Exception as e:
+        # the credentials will be refreshed on demand
+        logger.warning(f"Couldn't refresh google drive credentials in the background: {e}")
+        return
+    _schedule_refresh(token_file, creds)
+
+
+def _is_token_file_replaced(token_file: str, creds: Credentials) -> bool:
+    """Tell if the token file changed since the given credentials were loaded from it."""
+    cached = _CREDENTIALS_CACHE.get(token_file)
+    if cached is None:
+        return False
+    mtime, cached_creds = cached
+    try:
+        return cached_creds is not creds or os.stat(token_file).st_mtime != mtime
+    except OSError:
+        return True
+
+
+class _ThreadLocalHttp:
+    """Authorized http transport that keeps one persistent connection per thread.
+
+    httplib2 reuses its connections across requests (keep-alive) but it's not thread safe,
+    so every thread using the service gets its own authorized http object.
+    """
+
+    def __init__(self, credentials: Credentials):
+        self.credentials = credentials
+        self._local = threading.local()
+
+    @property
+    def http(self) -> AuthorizedHttp:
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = AuthorizedHttp(self.credentials, http=build_http())
+            self._local.http = http
+        return http
+
+    def request(self, *args, **kwargs):
+        return self.http.request(*args, **kwargs)
+
+    def close(self):
+        self.http.close()
+
+
+@functools.lru_cache(maxsize=4)
+def _build_service(creds: Credentials) -> Any:
+    """Build the drive service for the given credentials.
+
+    Services are shared across clients using the same credentials.
+    """
+    return build("drive", "v3", http=_ThreadLocalHttp(creds), cache_discovery=False)
+
+
+def _get_service(token_file: str) -> Any:
+    """Get a cached drive service for the given token file.
+
+    Concurrent first calls wait for each other, so they share a single service.
+    """
+    with _CREDENTIALS_LOCK:
+        return _build_service(_load_credentials(token_file))
+
+
 # Google drive object descriptors
+# Listings can produce thousands of descriptors, slots keep them small.
 @dataclass
 class _GoogleFileDescriptor(fs.DirEntry):
-    FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+    __slots__ = ("id_", "name", "mime_type", "parents", "size")
+
+    FOLDER_MIME_TYPE = sys.intern("application/vnd.google-apps.folder")
 
     id_: str
     name: str
     mime_type: str
     parents: List[str]
     url: urls.URL
+    # in bytes, unknown for folders and google docs
+    size: Optional[int]
 
-    @property
-    def is_dir(self):
-        return self.mime_type == self.FOLDER_MIME_TYPE
+    def __post_init__(self):
+        # fill the is_dir and is_file slots inherited from DirEntry
+        # listed mime types are interned, so this is usually an identity check
+        self.is_dir = self.mime_type == self.FOLDER_MIME_TYPE
+        self.is_file = not self.is_dir
 
-    @property
-    def is_file(self):
-        return not self.is_dir
+
+@dataclass
+class _FileTable:
+    """Files of a listing stored column by column.
+
+    Used when a large listing is scanned by name and parent, i.e. to index a drive, so
+    descriptors are only built for the files accessed by index.
+    """
+
+    __slots__ = ("ids", "names", "mime_types", "parents", "sizes")
+
+    ids: List[str]
+    names: List[str]
+    mime_types: List[str]
+    parents: List[List[str]]
+    sizes: List[Optional[int]]
+
+    @classmethod
+    def from_files(cls, files: List[Any]) -> "_FileTable":
+        return cls(
+            ids=[f.get("id") for f in files],
+            names=[f.get("name") for f in files],
+            mime_types=[_intern(f.get("mimeType")) for f in files],
+            parents=[f.get("parents") for f in files],
+            sizes=[_file_size(f) for f in files],
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> _GoogleFileDescriptor:
+        # descriptors used only to resolve paths have no url
+        url: Any = None
+        return _GoogleFileDescriptor(
+            id_=self.ids[index],
+            name=self.names[index],
+            mime_type=self.mime_types[index],
+            parents=self.parents[index],
+            url=url,
+            size=self.sizes[index],
+        )
 
 
 @dataclass
 class _GoogleDriveDescriptor:
+    __slots__ = ("id_", "name", "root_descriptor")
+
     id_: str
     name: str
     root_descriptor: _GoogleFileDescriptor
 
 
+# The user's own drive, always available
+DEFAULT_DRIVE_NAME = "My Drive"
+DEFAULT_DRIVE_ID = "root"
+_DEFAULT_DRIVE_DESCRIPTOR = _GoogleDriveDescriptor(
+    id_=DEFAULT_DRIVE_ID,
+    name=DEFAULT_DRIVE_NAME,
+    root_descriptor=_GoogleFileDescriptor(
+        id_=DEFAULT_DRIVE_ID,
+        name=DEFAULT_DRIVE_NAME,
+        mime_type=_GoogleFileDescriptor.FOLDER_MIME_TYPE,
+        url=urls.URL(f"gdrive:///{DEFAULT_DRIVE_NAME}/"),
+        parents=[],
+        size=None,
+    ),
+)
+
+
+# Drives are listed once per service and reused for this many seconds.
+DRIVES_CACHE_TTL = 5 * 60
+
+# service id -> (timestamp, service, drives by name)
+_DRIVES_CACHE: Dict[int, Tuple[float, Any, Dict[str, _GoogleDriveDescriptor]]] = {}
+
+
+@dataclass(frozen=True)
+class _DriveTree:
+    """Every file of a shared drive indexed by parent and name."""
+
+    __slots__ = ("files", "children")
+
+    files: _FileTable
+    # parent id -> name -> index in files
+    children: Dict[str, Dict[str, int]]
+
+    def get_child(self, parent: str, name: str) -> Optional[_GoogleFileDescriptor]:
+        index = self.children.get(parent, {}).get(name)
+        return None if index is None else self.files[index]
+
+
+# (service id, drive id) -> (timestamp, service, tree), the tree is None for large drives.
+# Trees share the drives time to live.
+_DRIVE_TREES_CACHE: Dict[Tuple[int, str], Tuple[float, Any, Optional[_DriveTree]]] = {}
+
+
+# (service, parent id, name)
+_DescriptorKey = Tuple[Any, Optional[str], str]
+
+# (timestamp, descriptor)
+_DescriptorEntry = Tuple[float, _GoogleFileDescriptor]
+
+
+class _DescriptorCache:
+    """Bounded LRU cache of file descriptors looked up by service, parent id and name.
+
+    Files can be renamed or removed by others, so entries expire after `ttl` seconds.
+    The cache is shared by clients running in different threads.
+    """
+
+    def __init__(self, maxsize: int, ttl: float = DRIVES_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "collections.OrderedDict[_DescriptorKey, _DescriptorEntry]"
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self, service: Any, parent: Optional[str], name: str
+    ) -> Optional[_GoogleFileDescriptor]:
+        key = (service, parent, name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            timestamp, descriptor = entry
+            if time.monotonic() - timestamp >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return descriptor
+
+    def put(
+        self, service: Any, parent: Optional[str], name: str, descriptor: _GoogleFileDescriptor
+    ) -> None:
+        key = (service, parent, name)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), descriptor)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, service: Any, file_id: str) -> None:
+        """Drop every entry of the service pointing to the given file id or its descendants."""
+        stale_ids = {file_id}
+        with self._lock:
+            while True:
+                stale = [
+                    key
+                    for key, (_, descriptor) in self._entries.items()
+                    if key[0] is service and (descriptor.id_ in stale_ids or key[1] in stale_ids)
+                ]
+                if not stale:
+                    return
+                for key in stale:
+                    stale_ids.add(self._entries.pop(key)[1].id_)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_DESCRIPTORS_CACHE = _DescriptorCache(maxsize=1024)
+
+
 class GoogleDriveFSClient(base_client.BaseClient["GoogleDriveFSClient"]):
     """Allow filesystem-like access to google drive.
 
@@ -123,36 +459,33 @@ class GoogleDriveFSClient(base_client.BaseClient["GoogleDriveFSClient"]):
 
     * the first element of the path has to be the drive name i.e. `My Drive` for the default
     drive or the drive name as it appears in the web ui for shared drives.
+
+    * files whose id is known can be accessed directly with an `id` query, i.e.
+    `gdrive:///My Drive/?id=<file id>`, which saves walking the path. These files can be
+    read, updated, listed and removed but not created.
     """
 
-    DEFAULT_DRIVE_NAME = "My Drive"
-    DEFAULT_DRIVE_ID = "root"
-    DEFAULT_DRIVE_DESCRIPTOR = _GoogleDriveDescriptor(
-        id_=DEFAULT_DRIVE_ID,
-        name=DEFAULT_DRIVE_NAME,
-        root_descriptor=_GoogleFileDescriptor(
-            id_=DEFAULT_DRIVE_ID,
-            name=DEFAULT_DRIVE_NAME,
-            mime_type=_GoogleFileDescriptor.FOLDER_MIME_TYPE,
-            url=urls.URL("gdrive:///{self.DEFAULT_DRIVE}"),
-            parents=[],
-        ),
-    )
+    DEFAULT_DRIVE_NAME = DEFAULT_DRIVE_NAME
+    DEFAULT_DRIVE_ID = DEFAULT_DRIVE_ID
+    DEFAULT_DRIVE_DESCRIPTOR = _DEFAULT_DRIVE_DESCRIPTOR
 
     allowed_schemes = ["gdrive", "googledrive"]
 
     drive_name: str
     path_parts: Tuple[str, ...]
+    file_id: Optional[str]
 
     # Not an easy task to figure out the type of the
     # returned value from the library
     _service: Optional[Any] = None
+    # descriptor of the url, resolved on first use
+    _leaf_descriptor: Optional[_GoogleFileDescriptor] = None
 
     def __init__(self, url: Union[urls.URL, str]) -> None:
         """Create a new GoogleDriveFSClient."""
         super().__init__(url)
 
-        parts = list(filter(lambda part: len(part) > 0, self.url.path.split("/")))
+        parts = [part for part in self.url.path.split("/") if part]
         if len(parts) == 0:
             raise ValueError(
                 f"Bad url: {self.url.path} :Google Drive needs at least "
@@ -160,6 +493,7 @@ class GoogleDriveFSClient(base_client.BaseClient["GoogleDriveFSClient"]):
             )
         self.drive_name = parts[0]
         self.path_parts = tuple(parts[1:])
+        self.file_id = (self.url.query or {}).get("id")
 
     @property
     def _drive(self):
@@ -177,27 +511,63 @@ class GoogleDriveFSClient(base_client.BaseClient["GoogleDriveFSClient"]):
         """Check the validity of the credentials."""
         if self._service is not None:
             return
-        creds = _load_credentials(token_file)
-        self._service = build("drive", "v3", credentials=creds)
+        self._service = _get_service(token_file)
 
     def close(self) -> None:
         """Close the dummy connection to google drive."""
         self.closed = True
 
+    @property
+    def size(self) -> Optional[int]:
+        """Size of the file in bytes, None if it can't be determined.
+
+        The size is only known once connected. The descriptor is kept by the client, so this
+        doesn't add requests to a later get.
+        """
+        if self._service is None:
+            return None
+        return self._get_leaf_descriptor().size
+
     # Stream methods:
 
     def get(self, writer: protocols.ByteWriter, **kwargs) -> None:
         """Get the contents of the google drive file."""
         leaf_descriptor = self._get_leaf_descriptor()
+        try:
+            _DownloadRequest(self._service, leaf_descriptor.id_, writer).execute()
+            return
+        except HttpError as error:
+            if not _is_not_found(error):
+                raise
+        # the cached descriptor is stale, i.e. the file was moved or removed elsewhere
+        self._forget(leaf_descriptor)
+        leaf_descriptor = self._get_leaf_descriptor()
         _DownloadRequest(self._service, leaf_descriptor.id_, writer).execute()
 
     def put(self, reader: protocols.ByteReader, **kwargs) -> None:
         """Write the contents of the reader to the google drive file."""
+        stream: Any = reader
+        seekable = getattr(stream, "seekable", lambda: False)()
+        start = stream.tell() if seekable else None
         try:
             file_descriptor = self._get_leaf_descriptor()
-            self._update(file_descriptor, reader)
+            try:
+                self._update(file_descriptor, reader)
+                return
+            except HttpError as error:
+                # the upload can only be retried if the reader can be rewound
+                if not _is_not_found(error) or start is None:
+                    raise
+            # the cached descriptor is stale, i.e. the file was moved or removed elsewhere
+            self._forget(file_descriptor)
+            stream.seek(start)
+            self._update(self._get_leaf_descriptor(), reader)
         except IOError:
+            if self.file_id is not None:
+                # there is no path to create the file in
+                raise
             # file doesn't exist, then create
+            self._leaf_descriptor = None
             self._create(reader)
 
     def _create(self, reader: protocols.ByteReader):
@@ -233,10 +603,16 @@ class GoogleDriveFSClient(base_client.BaseClient["GoogleDriveFSClient"]):
         if not leaf_descriptor.is_dir:
             raise IOError(f"{self.url} is not a folder")
 
-        url_base = str(self.url).rstrip("/") + "/"
+        # urls accessed by id carry a query, the entries are named after the path
+        url = urls.URL.from_components(
+            scheme=self.url.scheme, hostname=self.url.hostname, path=self.url.path
+        )
+        url_base = str(url).rstrip("/") + "/"
         lister = _ListFilesRequest(
-            self._service, url_base=url_base, q=f"'{leaf_descriptor.id_}' in parents"
+            self._service, url_base=url_base, q=f"'{_q_escape(leaf_descriptor.id_)}' in parents"
         )
+        if self.file_id is not None:
+            return _with_id_urls(lister.list())
         return lister.list()
 
     # remove
@@ -249,16 +625,59 @@ class GoogleDriveFSClient(base_client.BaseClient["GoogleDriveFSClient"]):
             "supportsTeamDrives": True,
         }
         self._service.files().delete(**args).execute()
+        self._forget(leaf_descriptor)
+
+    def _forget(self, descriptor: _GoogleFileDescriptor) -> None:
+        """Drop the cached descriptors of a file that no longer is where it was."""
+        self._leaf_descriptor = None
+        _DESCRIPTORS_CACHE.discard(self._service, descriptor.id_)
+        # the file could be in any of the drives of the service
+        for key in [key for key in _DRIVE_TREES_CACHE if key[0] == id(self._service)]:
+            _DRIVE_TREES_CACHE.pop(key, None)
 
-    @functools.lru_cache(maxsize=1)
     def _get_drives(self) -> Dict[str, _GoogleDriveDescriptor]:
+        """Get the drives available for the service, cached across clients."""
+        key = id(self._service)
+        now = time.monotonic()
+        cached = _DRIVES_CACHE.get(key)
+        # compare the service too, as ids can be reused once an object is collected
+        if cached is not None and cached[1] is self._service:
+            timestamp, _, drives = cached
+            if now - timestamp < DRIVES_CACHE_TTL:
+                return drives
+
         drives = {d.name: d for d in _ListDrivesRequest(self._service).list()}
         drives[self.DEFAULT_DRIVE_NAME] = self.DEFAULT_DRIVE_DESCRIPTOR
+        _DRIVES_CACHE[key] = (now, self._service, drives)
         return drives
 
     def _get_leaf_descriptor(self) -> _GoogleFileDescriptor:
-        """Get the last descriptor from the path part of the url."""
-        return self._get_path_descriptors()[-1]
+        """Get the last descriptor from the path part of the url.
+
+        The descriptor is kept for the lifetime of the client, so the path is only walked once.
+        """
+        if self._leaf_descriptor is None:
+            if self.file_id is not None:
+                self._leaf_descriptor = self._get_file_descriptor_by_id(self.file_id)
+            else:
+                self._leaf_descriptor = self._get_path_descriptors()[-1]
+        return self._leaf_descriptor
+
+    def _get_file_descriptor_by_id(self, file_id: str) -> _GoogleFileDescriptor:
+        """Get the descriptor of a file from its id in a single request."""
+        args = {
+            "fileId": file_id,
+            "fields": "id, name, mimeType, parents, size",
+            "supportsAllDrives": True,
+        }
+        service: Any = self._service
+        try:
+            result = service.files().get(**args).execute()
+        except HttpError as error:
+            if _is_not_found(error):
+                raise IOError(f"Descriptor not found for {self.url}") from error
+            raise
+        return _file_descriptor(result, self.url)
 
     def _get_path_descriptors(self, ignore_tail=False) -> List[_GoogleFileDescriptor]:
         parts = self.path_parts
@@ -269,31 +688,215 @@ class GoogleDriveFSClient(base_client.BaseClient["GoogleDriveFSClient"]):
     def _path_parts_to_descriptors(
         self, drive: _GoogleDriveDescriptor, path_parts: Iterable[str]
     ) -> List[_GoogleFileDescriptor]:
-        """Convert the path parts into google drive descriptors."""
+        """Convert the path parts into google drive descriptors.
+
+        Lookups start from the drive root, so the cached descriptors are scoped to the drive.
+        """
+        path_parts = list(path_parts)
         file_descriptors = [drive.root_descriptor]
-        parent = None
-        for pathPart in path_parts:
-            file_descriptor = self._get_file_descriptor_by_name(pathPart, parent)
+        parent = drive.root_descriptor.id_
+        # the drive is only listed once a part misses the descriptors cache, and only if more
+        # than one part is left, otherwise a single query by name is cheaper
+        tree: Optional[_DriveTree] = None
+        tree_fetched = False
+        # candidates for the parts from the first cache miss onwards, fetched in one go
+        candidates: Optional[List[Optional[List[_GoogleFileDescriptor]]]] = None
+        queried = False
+        offset = 0
+        for index, pathPart in enumerate(path_parts):
+            file_descriptor = _DESCRIPTORS_CACHE.get(self._service, parent, pathPart)
+            if file_descriptor is None and not tree_fetched and len(path_parts) - index > 1:
+                tree = self._get_drive_tree(drive)
+                tree_fetched = True
+            if file_descriptor is None and tree is not None:
+                file_descriptor = tree.get_child(parent, pathPart)
+            if file_descriptor is None:
+                if not queried and len(path_parts) - index > 1:
+                    # if the matches don't fit a page the parts are looked up one by one
+                    candidates = self._query_path_candidates(parent, path_parts[index:])
+                    queried = True
+                    offset = index
+                part_candidates = None
+                if candidates is not None and index - offset < len(candidates):
+                    part_candidates = candidates[index - offset]
+                if part_candidates is None:
+                    file_descriptor = self._get_file_descriptor_by_name(pathPart, parent)
+                elif index == offset:
+                    # the first candidates were already filtered by parent in the query,
+                    # which is the only way to match the "root" alias of the user's drive
+                    file_descriptor = next(iter(part_candidates), None)
+                else:
+                    file_descriptor = _pick_child(part_candidates, parent)
+                if file_descriptor is None:
+                    # the query returned every match, looking the part up again won't help
+                    raise self._part_not_found(pathPart, parent)
+                _DESCRIPTORS_CACHE.put(self._service, parent, pathPart, file_descriptor)
             parent = file_descriptor.id_
             file_descriptors.append(file_descriptor)
 
         return file_descriptors
 
+    def _get_drive_tree(self, drive: _GoogleDriveDescriptor) -> Optional[_DriveTree]:
+        """Get the tree of a small shared drive, cached across clients.
+
+        Shared drives whose files fit in a single listing page are listed at once, so
+        resolving any path in them afterwards doesn't need any request. Returns None for the
+        user's own drive, as it can't be listed on its own, and for larger drives. Those are
+        still listed once per time to live, to find out they don't fit.
+        """
+        if drive.id_ == self.DEFAULT_DRIVE_ID:
+            return None
+        key = (id(self._service), drive.id_)
+        now = time.monotonic()
+        cached = _DRIVE_TREES_CACHE.get(key)
+        if cached is not None and cached[1] is self._service:
+            timestamp, _, tree = cached
+            if now - timestamp < DRIVES_CACHE_TTL:
+                return tree
+
+        tree = _list_drive_tree(self._service, drive.id_)
+        _DRIVE_TREES_CACHE[key] = (now, self._service, tree)
+        return tree
+
+    def _query_path_candidates(
+        self, parent: str, path_parts: List[str]
+    ) -> Optional[List[Optional[List[_GoogleFileDescriptor]]]]:
+        """Look up several path parts at once with a single query joining their names.
+
+        Only the first part is restricted to the parent. Returns None when the matches don't
+        fit in a single page, as some candidates would be missing. Otherwise every match of
+        each part is returned, None for the parts the query can't tell.
+        """
+        path_parts = path_parts[:MAX_QUERY_PARTS]
+        q = " or ".join(
+            f"({_name_query(pathPart, parent if index == 0 else None)})"
+            for index, pathPart in enumerate(path_parts)
+        )
+        lister = _ListFilesRequest(self._service, q=q)
+        results = lister._execute()
+        if results.get("nextPageToken") is not None:
+            return None
+
+        by_name: Dict[str, List[_GoogleFileDescriptor]] = collections.defaultdict(list)
+        for descriptor in lister.build_descriptors(results.get("files", [])):
+            by_name[descriptor.name].append(descriptor)
+        candidates: List[Optional[List[_GoogleFileDescriptor]]] = [
+            by_name.get(pathPart, []) for pathPart in path_parts
+        ]
+        if path_parts[0] in path_parts[1:]:
+            # matches of the first part may come from the unrestricted clauses
+            candidates[0] = None
+        return candidates
+
     def _get_file_descriptor_by_name(self, name: str, parent: Optional[str] = None):
         """Get the file id given the file name and it's parent."""
-        args = {"q": f" name = '{name}'"}
+        args = {"q": _name_query(name, parent)}
+
+        # only the first match is needed, don't fetch further pages
+        result = next(iter(_ListFilesRequest(self._service, **args).list()), None)
 
-        if parent is not None:
-            args["q"] += f" and '{parent}' in parents"
+        if result is None:
+            raise self._part_not_found(name, parent)
+        return result
 
-        results = list(_ListFilesRequest(self._service, **args).list())
+    def _part_not_found(self, name: str, parent: Optional[str]) -> IOError:
+        return IOError(
+            f"Descriptor not found for {self.url} "
+            f"Could not find part {name} with parent id {parent}"
+        )
+
+
+def _with_id_urls(
+    descriptors: Iterable[_GoogleFileDescriptor],
+) -> Iterable[_GoogleFileDescriptor]:
+    """Address the entries of a folder accessed by id by their own ids too."""
+    for descriptor in descriptors:
+        query: Any = {"id": descriptor.id_}
+        yield dataclasses.replace(descriptor, url=descriptor.url.copy(query=query))
+
+
+def _intern(value: Optional[str]) -> Any:
+    # a handful of mime types is shared by a whole listing
+    return None if value is None else sys.intern(value)
+
+
+def _file_size(f: Any) -> Optional[int]:
+    # sizes are sent as strings, unknown for folders and google docs
+    return int(f["size"]) if "size" in f else None
+
+
+def _file_descriptor(f: Any, url: Any) -> _GoogleFileDescriptor:
+    """Build the descriptor of a file as sent by the api."""
+    return _GoogleFileDescriptor(
+        id_=f.get("id"),
+        name=f.get("name"),
+        mime_type=_intern(f.get("mimeType")),
+        parents=f.get("parents"),
+        url=url,
+        size=_file_size(f),
+    )
+
+
+def _is_not_found(error: HttpError) -> bool:
+    return error.resp.status == 404
+
+
+def _is_inaccessible(error: Exception) -> bool:
+    return isinstance(error, HttpError) and error.resp.status in (403, 404)
+
+
+def _list_drive_tree(service: Any, drive_id: str) -> Optional[_DriveTree]:
+    """List every file of a shared drive by parent and name, None if they don't fit a page."""
+    lister = _ListFilesRequest(
+        service,
+        driveId=drive_id,
+        corpora="drive",
+        includeItemsFromAllDrives=True,
+        q="trashed = false",
+        # only what's needed to walk paths and size the leaves, this listing can be large
+        fields="files(id, name, mimeType, parents, size)",
+    )
+    results = lister._execute()
+    if results.get("nextPageToken") is not None:
+        return None
+
+    files = _FileTable.from_files(results.get("files", []))
+    children: Dict[str, Dict[str, int]] = collections.defaultdict(dict)
+    for index, (name, parents) in enumerate(zip(files.names, files.parents)):
+        for parent in parents or []:
+            # the first one wins as in the queries, names aren't unique in google drive
+            children[parent].setdefault(name, index)
+    return _DriveTree(files=files, children=children)
+
+
+def _pick_child(
+    candidates: List[_GoogleFileDescriptor], parent: str
+) -> Optional[_GoogleFileDescriptor]:
+    """Get the first candidate under the given parent."""
+    for candidate in candidates:
+        if parent in (candidate.parents or []):
+            return candidate
+    return None
+
+
+# Drive queries quote strings with single quotes and escape with backslashes.
+_Q_ESCAPES = str.maketrans({"\\": "\\\\", "'": "\\'"})
+
+# Queries to find files by name, trashed files are never part of a path.
+_NAME_QUERY = "name = '{name}' and trashed = false"
+_NAME_IN_PARENT_QUERY = "name = '{name}' and '{parent}' in parents and trashed = false"
 
-        if len(results) == 0:
-            raise IOError(
-                f"Descriptor not found for {self.url} "
-                f"Could not find part {name} with parent id {parent}"
-            )
-        return results[0]
+
+def _q_escape(value: str) -> str:
+    """Escape a value to be used inside a quoted string of a drive query."""
+    return value.translate(_Q_ESCAPES)
+
+
+def _name_query(name: str, parent: Optional[str] = None) -> str:
+    """Build the query to find a file by name and, optionally, its parent."""
+    if parent is None:
+        return _NAME_QUERY.format(name=_q_escape(name))
+    return _NAME_IN_PARENT_QUERY.format(name=_q_escape(name), parent=_q_escape(parent))
 
 
 class _GoogleDriveRequest:
@@ -310,15 +913,26 @@ class _GoogleDriveRequest:
 class _DownloadRequest(_GoogleDriveRequest):
     """Download data from google drive."""
 
-    def __init__(self, service: Any, file_id: str, writer: protocols.ByteWriter, **kwargs):
+    def __init__(
+        self,
+        service: Any,
+        file_id: str,
+        writer: protocols.ByteWriter,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        **kwargs,
+    ):
         super().__init__(service, kwargs)
         self.args["fileId"] = file_id
         self.args["supportsTeamDrives"] = True
         self.writer = writer
+        self.chunk_size = chunk_size
 
     def execute(self):
         request = self.service.files().get_media(**self.args)
-        downloader = MediaIoBaseDownload(self.writer, request)
+        # Each chunk is fetched as a single range request and written to
+        # the writer in one call, so the chunk size drives both the number
+        # of round trips and the peak memory used per chunk.
+        downloader = MediaIoBaseDownload(self.writer, request, chunksize=self.chunk_size)
         done = False
         while done is False:
             status, done = downloader.next_chunk()
@@ -362,24 +976,52 @@ class _UpdateRequest(_GoogleDriveRequest):
         self.service.files().update(media_body=media_body, **self.args).execute()
 
 
+# Shared so the prefetch threads, and the connections they keep, outlive a single listing.
+_PREFETCH_EXECUTOR = futures.ThreadPoolExecutor(
+    max_workers=PREFETCH_WORKERS, thread_name_prefix="tentaclio-gdrive-prefetch"
+)
+# Same for the threads resolving drive roots, which run while a page of drives is consumed.
+_DRIVE_ROOT_EXECUTOR = futures.ThreadPoolExecutor(
+    max_workers=DRIVE_ROOT_WORKERS, thread_name_prefix="tentaclio-gdrive-root"
+)
+
+
 class _Lister(
     _GoogleDriveRequest, abc.ABC, Generic[T],
 ):
     def __init__(self, service: Any, **kwargs):
         super().__init__(service, kwargs)
         # some standard arguments to send to the service
-        self.args["pageSize"] = 100
+        self.args.setdefault("pageSize", 100)
 
     def list(self) -> Iterable[T]:
-        """List the resources controlling the pagination."""
-        done = False
-        while not done:
-            results = self._execute()
+        """List the resources controlling the pagination.
 
-            yield from self._yielder(results)
-            # check if we need to keep on getting pages
-            self.args["pageToken"] = results.get("nextPageToken", None)
-            done = self.args["pageToken"] is None
+        Once the consumer moves past the first item of a page, the next page is fetched in a
+        background thread so the request overlaps with the consumption of the current one.
+        """
+        next_page: Optional[futures.Future] = None
+        try:
+            results = self._execute()
+            while True:
+                # check if we need to keep on getting pages
+                self.args["pageToken"] = results.get("nextPageToken", None)
+                for item in self._yielder(results):
+                    yield item
+                    if next_page is None and self.args["pageToken"] is not None:
+                        next_page = _PREFETCH_EXECUTOR.submit(self._execute)
+
+                if next_page is not None:
+                    results = next_page.result()
+                    next_page = None
+                elif self.args["pageToken"] is not None:
+                    results = self._execute()
+                else:
+                    return
+        finally:
+            # the consumer may stop early, don't wait for a page nobody will read
+            if next_page is not None:
+                next_page.cancel()
 
     @abc.abstractmethod
     def _execute(self) -> Any:
@@ -390,83 +1032,144 @@ class _Lister(
         pass
 
 
+# Arguments sent with every files list request unless overridden.
+_LIST_FILES_DEFAULTS = {
+    # maximum page size allowed for files
+    "pageSize": 1000,
+    # Get team drives too
+    "supportsTeamDrives": True,
+    "includeTeamDriveItems": True,
+    # the page token is only returned if requested
+    "fields": "nextPageToken, files(id, name, mimeType, parents, size)",
+}
+
+
 class _ListFilesRequest(_Lister[_GoogleFileDescriptor]):
-    def __init__(self, service: Any, url_base: Optional[str] = None, **kwargs):
-        super().__init__(service, **kwargs)
-        # Get team drives too
-        self.args["supportsTeamDrives"] = True
-        self.args["includeTeamDriveItems"] = True
-        self.args["fields"] = "files(id, name, mimeType, parents)"
+    def __init__(
+        self,
+        service: Any,
+        url_base: Optional[str] = None,
+        fields: Optional[str] = None,
+        **kwargs,
+    ):
+        if fields is not None:
+            kwargs["fields"] = "nextPageToken, " + fields
+        super().__init__(service, **{**_LIST_FILES_DEFAULTS, **kwargs})
         self.url_base = url_base
 
+    def request(self) -> Any:
+        """Build the list request without executing it, i.e. to add it to a batch."""
+        return self.service.files().list(**self.args)
+
     def _execute(self) -> Any:
-        return self.service.files().list(**self.args).execute()
+        return self.request().execute()
 
     def _yielder(self, results) -> Iterable[_GoogleFileDescriptor]:
-        yield from self._build_descriptors(results.get("files", []))
-
-    def _build_descriptors(self, files: List[Any]) -> Iterable[_GoogleFileDescriptor]:
-        for f in files:
-            args = {
-                "id_": f.get("id"),
-                "name": f.get("name"),
-                "mime_type": f.get("mimeType"),
-                "parents": f.get("parents"),
-                "url": None,
-            }
-            if self.url_base is not None:
-                args["url"] = urls.URL(self.url_base + args["name"])
-            yield _GoogleFileDescriptor(**args)
+        yield from self.build_descriptors(results.get("files", []))
+
+    def build_descriptors(self, files: List[Any]) -> List[_GoogleFileDescriptor]:
+        """Build the descriptors of the files of a list response, i.e. from a batch."""
+        url_base = self.url_base
+        if url_base is None:
+            # descriptors used only to resolve paths have no url
+            return [_file_descriptor(f, None) for f in files]
+        return [_file_descriptor(f, urls.URL(url_base + f.get("name"))) for f in files]
 
 
 # Getting the drive root:
 # This is quite a hack as there is no direct way, documented or that I could
 # find, to get the root folder from a shared drive.
-# So the process consists on getting one random file from a drive
-# and navigate through the parents until hitting a file descriptor that has no parents.
+# The root folder usually shares its id with the drive, so it's requested right away.
+# In the same round trip one random file from a drive is fetched, if the root can't be
+# requested directly navigate through the parents until hitting a file descriptor that has
+# no parents.
 
 
 def _get_drive_root(service: Any, drive_id: str):
-    """Get the drive root by navigating up the tree from a random file."""
-    done = False
-    parent = _get_random_parent(service, drive_id)
+    """Get the drive root, navigating up the tree from a random file if needed."""
     file_args = {"fields": "id, name, mimeType, parents", "supportsAllDrives": True}
+    responses: Dict[str, Any] = {}
+    errors: Dict[str, Exception] = {}
+
+    def _collect(request_id: str, response: Any, exception: Optional[Exception]):
+        if exception is None:
+            responses[request_id] = response
+        else:
+            errors[request_id] = exception
+
+    batch = service.new_batch_http_request(callback=_collect)
+    batch.add(service.files().get(fileId=drive_id, **file_args), request_id="root")
+    batch.add(_random_file_lister(service, drive_id).request(), request_id="random")
+    batch.execute()
+
+    root_error = errors.get("root")
+    if root_error is not None:
+        # the root may not share its id with the drive, or may not be readable
+        if not _is_inaccessible(root_error):
+            raise root_error
+        logger.debug(f"Drive root not found by id for drive {drive_id}: {root_error}")
+
+    result = responses.get("root")
+    if result is not None and "parents" not in result:
+        return _drive_root_descriptor(result)
+
+    # the random file is only needed to walk up to the root
+    if "random" in errors:
+        raise errors["random"]
+
+    done = False
+    parent = _get_random_parent(service, drive_id, responses.get("random"))
     while not done:
         file_args["fileId"] = parent
         result = service.files().get(**file_args).execute()
         if result is None:
             raise IOError("Parent not found while resolving drive root for drive_id: {drive_id}")
         if "parents" not in result:
-            args = {
-                "id_": result.get("id"),
-                "name": result.get("name"),
-                "mime_type": result.get("mimeType"),
-                "parents": result.get("parents"),
-                "url": None,
-            }
-            return _GoogleFileDescriptor(**args)
+            return _drive_root_descriptor(result)
         parent = result["parents"][0]
 
 
-def _get_random_parent(service: Any, drive_id: str):
-    """Get random parent from this drive."""
+def _drive_root_descriptor(result: Any) -> _GoogleFileDescriptor:
+    url: Any = None
+    return _GoogleFileDescriptor(
+        id_=result.get("id"),
+        name=result.get("name"),
+        mime_type=result.get("mimeType"),
+        parents=result.get("parents"),
+        url=url,
+        size=None,
+    )
+
+
+def _random_file_lister(service: Any, drive_id: str) -> "_ListFilesRequest":
     args: Dict[str, Any] = {
         "driveId": drive_id,
         "corpora": "drive",
         "pageSize": "1",
         "includeItemsFromAllDrives": True,
     }
-    lister = _ListFilesRequest(service, **args)
-    children = list(lister.list())
+    return _ListFilesRequest(service, **args)
+
+
+def _get_random_parent(service: Any, drive_id: str, results: Optional[Dict[str, Any]] = None):
+    """Get random parent from this drive.
+
+    The listing of the drive is fetched unless given, i.e. when it was part of a batch.
+    """
+    lister = _random_file_lister(service, drive_id)
+    if results is None:
+        child = next(iter(lister.list()), None)
+    else:
+        child = next(iter(lister.build_descriptors(results.get("files", []))), None)
 
-    if len(children) == 0:
+    if child is None:
         raise IOError("No files found while inspecting drive")
 
     # No parents we're in the root
-    if children[0].parents is None or len(children[0].parents) == 0:
-        return children[0].id_
+    if child.parents is None or len(child.parents) == 0:
+        return child.id_
 
-    return children[0].parents[0]
+    return child.parents[0]
 
 
 # END OF HACK
@@ -475,29 +1178,41 @@ def _get_random_parent(service: Any, drive_id: str):
 class _ListDrivesRequest(_Lister[_GoogleDriveDescriptor]):
     def __init__(self, service: Any, **kwargs):
         super().__init__(service, **kwargs)
-        self.args["fields"] = "drives(id, name)"
+        self.args["fields"] = "nextPageToken, drives(id, name)"
 
     def _execute(self) -> Any:
         return self.service.drives().list(**self.args).execute()
 
     def _yielder(self, results) -> Iterable[_GoogleDriveDescriptor]:
-        for drive in results.get("drives", []):
-            try:
-                args = {
-                    "id_": drive.get("id"),
-                    "name": drive.get("name"),
-                    "root_descriptor": _get_drive_root(self.service, drive.get("id"),),
-                }
-            except IOError as e:
-                # There are times that we can't access the root of shared drive but we can access
-                # random files, this raise an IOError while trying to fetch the root of drive,
-                # let's ignore those drives for the time being
-                if str(e) == "No files found while inspecting drive":
-                    logger.warning(
-                        f"Ignoring drive {drive.get('name')} due "
-                        "to permission errors getting the root."
-                        "Ask for permissions to read the whole shared drive."
-                    )
-                continue
-
-            yield _GoogleDriveDescriptor(**args)
+        drives = results.get("drives", [])
+        # resolving a root takes several sequential calls, resolve the drives concurrently
+        pending = {
+            _DRIVE_ROOT_EXECUTOR.submit(_get_drive_root, self.service, drive.get("id")): drive
+            for drive in drives
+        }
+        try:
+            for future in futures.as_completed(pending):
+                drive = pending[future]
+                try:
+                    root_descriptor = future.result()
+                except IOError as e:
+                    # There are times that we can't access the root of shared drive but we can
+                    # access random files, this raise an IOError while trying to fetch the root
+                    # of drive, let's ignore those drives for the time being
+                    if str(e) == "No files found while inspecting drive":
+                        logger.warning(
+                            f"Ignoring drive {drive.get('name')} due "
+                            "to permission errors getting the root."
+                            "Ask for permissions to read the whole shared drive."
+                        )
+                    continue
+
+                yield _GoogleDriveDescriptor(
+                    id_=drive.get("id"),
+                    name=drive.get("name"),
+                    root_descriptor=root_descriptor,
+                )
+        finally:
+            # the consumer may stop early, don't resolve roots nobody will read
+            for future in pending:
+                future.cancel()
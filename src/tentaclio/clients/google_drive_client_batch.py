@@ -0,0 +1,87 @@
+"""Concurrent transfers to google drive.
+
+Drive doesn't batch media requests, but uploads scale with the number of requests in flight
+up to the per user rate limits.
+"""
+import logging
+import random
+import time
+from concurrent import futures
+from typing import Any, Iterable, Tuple, Union, cast
+
+from googleapiclient.errors import HttpError
+
+from tentaclio import protocols, urls
+
+from .google_drive_client import GoogleDriveFSClient
+
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["put_many"]
+
+# Uploads running at the same time.
+MAX_CONCURRENCY = 10
+
+# Attempts for each upload while drive keeps rejecting it for exceeding the rate limits.
+MAX_ATTEMPTS = 5
+
+# Seconds to wait before retrying a rate limited upload, doubled on each attempt.
+BACKOFF_DELAY = 1.0
+
+_RATE_LIMIT_REASONS = (b"rateLimitExceeded", b"userRateLimitExceeded")
+
+
+def put_many(
+    urls_readers: Iterable[Tuple[Union[urls.URL, str], protocols.ByteReader]],
+    max_concurrency: int = MAX_CONCURRENCY,
+) -> None:
+    """Upload the contents of each reader to its google drive url concurrently.
+
+    All the uploads share the same drive service. Uploads hitting the rate limits are retried
+    with exponential backoff, which requires their readers to be seekable.
+
+    Raises the first error found once every upload has finished.
+    """
+    uploads = list(urls_readers)
+    if not uploads:
+        return
+    # load the credentials and list the drives before the uploads race to do it
+    with GoogleDriveFSClient(uploads[0][0]) as client:
+        client._get_drives()
+
+    with futures.ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        pending = [executor.submit(_put, url, reader) for url, reader in uploads]
+
+    for future in pending:
+        error = future.exception()
+        if error is not None:
+            raise error
+
+
+def _put(url: Union[urls.URL, str], reader: protocols.ByteReader) -> None:
+    """Upload the reader retrying while drive is rate limiting the user."""
+    stream = cast(Any, reader)
+    seekable = getattr(stream, "seekable", lambda: False)()
+    start = stream.tell() if seekable else None
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            with GoogleDriveFSClient(url) as client:
+                client.put(reader)
+            return
+        except HttpError as error:
+            if attempt == MAX_ATTEMPTS or start is None or not _is_rate_limited(error):
+                raise
+
+        # jitter the delay so concurrent uploads don't retry in lockstep
+        delay = BACKOFF_DELAY * 2 ** (attempt - 1) * random.uniform(1, 2)
+        logger.info(f"Rate limited uploading {url}, retrying in {delay:.1f}s")
+        time.sleep(delay)
+        stream.seek(start)
+
+
+def _is_rate_limited(error: HttpError) -> bool:
+    status = error.resp.status
+    if status == 429:
+        return True
+    return status == 403 and any(reason in error.content for reason in _RATE_LIMIT_REASONS)
@@ -1,7 +1,11 @@
 """GS Stream client."""
-from typing import Optional, Union, Tuple, cast
+import io
+import os
+import threading
+from typing import Any, Dict, Optional, Union, Tuple, cast
 
 from google.cloud import storage
+from requests import adapters
 
 from tentaclio import urls, protocols
 
@@ -10,6 +14,72 @@ from . import base_client, decorators, exceptions
 
 __all__ = ["GSClient"]
 
+# Buffer size used when streaming from/to unbuffered (raw) streams.
+RAW_STREAM_BUFFER_SIZE = 8 * 1024 * 1024
+
+# Environment variables that change how the default credentials are resolved.
+CLIENT_ENV_VARS = ("GOOGLE_APPLICATION_CREDENTIALS", "GOOGLE_CLOUD_PROJECT")
+
+# Connections kept open to the storage api, enough for the threads sharing a storage client.
+HTTP_POOL_SIZE = 32
+
+# Storage clients shared across GSClients, keyed by the values of CLIENT_ENV_VARS.
+_GS_CLIENT_CACHE: Dict[Tuple[Optional[str], ...], storage.Client] = {}
+_GS_CLIENT_CACHE_LOCK = threading.Lock()
+
+
+def _get_storage_client() -> storage.Client:
+    """Get a storage client for the current environment.
+
+    Creating a client resolves the default credentials and opens a new http session, so
+    clients are reused. Storage clients are safe to share between threads.
+    """
+    key = tuple(os.environ.get(var) for var in CLIENT_ENV_VARS)
+    client = _GS_CLIENT_CACHE.get(key)
+    if client is not None:
+        return client
+    with _GS_CLIENT_CACHE_LOCK:
+        # threads racing on the first client resolve the credentials only once
+        client = _GS_CLIENT_CACHE.get(key)
+        if client is None:
+            client = _create_storage_client()
+            _GS_CLIENT_CACHE[key] = client
+    return client
+
+
+def _create_storage_client() -> storage.Client:
+    """Create a storage client able to keep open a connection per concurrent request."""
+    client = storage.Client()
+    session = client._http
+    # requests only keeps 10 connections per host by default, don't replace a mutual tls adapter
+    if not getattr(session, "is_mtls", False):
+        adapter = adapters.HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE
+        )
+        session.mount("https://", adapter)
+    return client
+
+
+def _get_remaining_size(reader: protocols.ByteReader) -> Optional[int]:
+    """Get the number of bytes left in the reader if it can be known without reading it.
+
+    Knowing the size upfront lets the storage client upload small objects in a single request
+    rather than opening a resumable upload session.
+    """
+    # tell positions of text streams are opaque cookies, not byte offsets
+    if isinstance(reader, io.TextIOBase):
+        return None
+    stream = cast(Any, reader)
+    try:
+        if not stream.seekable():
+            return None
+        position = stream.tell()
+        end = stream.seek(0, io.SEEK_END)
+        stream.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return None
+    return end - position
+
 
 class GSClient(base_client.BaseClient["GSClient"]):
     """GS client.
@@ -48,12 +118,13 @@ class GSClient(base_client.BaseClient["GSClient"]):
             self.bucket = None
 
     def _connect(self) -> storage.Client:
-        return storage.Client()
+        return _get_storage_client()
 
     def close(self) -> None:
         """Close the connection.
 
-        This is fake. GS doesn't allow to close gs connections.
+        This is fake. GS doesn't allow to close gs connections,
+        and the underlying storage client is shared with other GSClients.
         """
         # gs doesn't have close method
         if self.closed:
@@ -148,14 +219,32 @@ class GSClient(base_client.BaseClient["GSClient"]):
     ) -> None:
         """Download file on the client."""
         blob = self._get_blob(bucket_name, key_name)
-        blob.download_to_file(writer)
+        if not isinstance(writer, io.RawIOBase):
+            blob.download_to_file(writer)
+            return
+        # the download is written in small pieces, avoid a system call for each of them
+        buffered_writer = io.BufferedWriter(writer, buffer_size=RAW_STREAM_BUFFER_SIZE)
+        try:
+            blob.download_to_file(buffered_writer)
+        finally:
+            # flush and release the writer without closing it
+            buffered_writer.detach()
 
     def _put(
         self, reader: protocols.ByteReader, bucket_name: str, key_name: str
     ) -> None:
         """Upload on the client."""
         blob = self._get_blob(bucket_name, key_name)
-        blob.upload_from_file(reader)
+        size = _get_remaining_size(reader)
+        if not isinstance(reader, io.RawIOBase):
+            blob.upload_from_file(reader, size=size)
+            return
+        buffered_reader = io.BufferedReader(reader, buffer_size=RAW_STREAM_BUFFER_SIZE)
+        try:
+            blob.upload_from_file(buffered_reader, size=size)
+        finally:
+            # release the reader without closing it
+            buffered_reader.detach()
 
     def _remove(
         self, bucket_name: str, key_name: str
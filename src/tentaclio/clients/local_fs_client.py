@@ -1,6 +1,7 @@
 """Local filesystem client."""
 import os
-from typing import Iterable, Union
+import shutil
+from typing import BinaryIO, Iterable, Optional, Union, cast
 
 from tentaclio import fs, protocols, urls
 
@@ -30,17 +31,25 @@ class LocalFSClient(base_client.BaseClient["LocalFSClient"]):
         """Close the dummy connection to the local fs."""
         self.closed = True
 
+    @property
+    def size(self) -> Optional[int]:
+        """Size of the file in bytes, None if it can't be determined."""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return None
+
     # Stream methods:
 
     def get(self, writer: protocols.ByteWriter, **kwargs) -> None:
         """Get the contents of the file."""
         with open(self.path, "rb") as f:
-            writer.write(f.read())
+            shutil.copyfileobj(f, writer)
 
     def put(self, reader: protocols.ByteReader, **kwargs) -> None:
         """Write the contents of the reader to the file."""
         with open(self.path, "wb") as f:
-            f.write(bytes(reader.read()))
+            shutil.copyfileobj(cast(BinaryIO, reader), f)
 
     # scandir related methods
 
@@ -1,4 +1,5 @@
 """Define default copier."""
+import shutil
 from typing import cast
 
 from tentaclio.protocols import Reader, Writer
@@ -15,4 +16,4 @@ class DefaultCopier:
     def copy(self, source: URL, dest: URL):
         """Copy the contents of the source url into the dest url."""
         with open(str(source), mode="rb") as reader, open(str(dest), mode="wb") as writer:
-            cast(Writer, writer).write(cast(Reader, reader).read())
+            shutil.copyfileobj(cast(Reader, reader), cast(Writer, writer))
@@ -13,6 +13,8 @@ __all__ = ["SCANNER_REGISTRY", "DirEntry", "build_file_entry", "build_folder_ent
 class DirEntry:
     """Entry containing information about a directory scan item."""
 
+    __slots__ = ("url", "is_dir", "is_file")
+
     def __init__(self, *, url: URL, is_dir: bool, is_file: bool):
         """Create new dir entry."""
         self.url: URL = url
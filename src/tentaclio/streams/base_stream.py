@@ -16,7 +16,6 @@ is used and only exposes the bytes versions to the S3Client.
 This is down by using TextIOWrapper when text is needed by the client code and exposes the inner
 buffer to the underlying client.
 """
-import abc
 import io
 from typing import IO, Any, Optional
 
@@ -25,17 +24,75 @@ from typing_extensions import ContextManager, Protocol
 from tentaclio import protocols
 
 
+# Size of the reusable buffer used when copying between streams.
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def copy_stream(reader: Any, writer: Any, buffer_size: int = COPY_BUFFER_SIZE) -> int:
+    """Copy the contents of the reader into the writer using a fixed size buffer.
+
+    Binary readers that implement `readinto` are copied through a single preallocated
+    buffer, otherwise the contents are read in chunks of `buffer_size`.
+    Return the number of bytes (or characters) copied.
+    """
+    readinto = getattr(reader, "readinto", None)
+    if readinto is None:
+        return _copy_chunks(reader, writer, buffer_size)
+
+    total = 0
+    view = memoryview(bytearray(buffer_size))
+    while True:
+        size = readinto(view)
+        if not size:
+            break
+        writer.write(view[:size])
+        total += size
+    return total
+
+
+def _copy_chunks(reader: Any, writer: Any, buffer_size: int) -> int:
+    total = 0
+    while True:
+        chunk = reader.read(buffer_size)
+        if not chunk:
+            break
+        writer.write(chunk)
+        total += len(chunk)
+    return total
+
+
+def _get_size(client: Any) -> Optional[int]:
+    """Get the size of the resource if the client can tell it without fetching it."""
+    size = getattr(client, "size", None)
+    if isinstance(size, int) and not isinstance(size, bool):
+        return size
+    return None
+
+
+def _preallocate(buffer: IO, size: Optional[int]) -> bool:
+    """Grow the buffer to the expected size in one go.
+
+    The contents are overwritten by the client, so the buffer needs truncating
+    after loading in case less data than expected was written.
+    Return True if the buffer was preallocated.
+    """
+    if not size or size <= 0:
+        return False
+    buffer.seek(size - 1)
+    buffer.write(b"\0")
+    buffer.seek(0)
+    return True
+
+
 class Streamer(Protocol):
     """Interface for stream-based connections."""
 
     # Stream methods:
 
-    @abc.abstractmethod
     def get(self, writer: protocols.ByteWriter, **params) -> None:
         """Read the contents from the stream and write them the the ByteWriter."""
         ...
 
-    @abc.abstractmethod
     def put(self, reader: protocols.ByteReader, **params) -> None:
         """Write the contents of the reader into the client stream."""
         ...
@@ -129,7 +186,11 @@ class StreamerReader(StreamBaseIO):
     buffer: IO
 
     def __init__(self, client: ContextManager[Streamer], buffer: IO):
-        """Create a reader that will read from the given client to the passed buffer."""
+        """Create a reader that will read from the given client to the passed buffer.
+
+        If the client can tell the size of the contents once connected, the byte buffer is
+        allocated at once.
+        """
         super().__init__(buffer)
         self.client = client
         self._load()
@@ -137,7 +198,10 @@ class StreamerReader(StreamBaseIO):
     def _load(self):
         # atomic get so we open/close connections swiftly
         with self.client:
+            preallocated = _preallocate(self.buffer, _get_size(self.client))
             self.client.get(self.buffer)
+        if preallocated:
+            self.buffer.truncate()
         self.buffer.seek(0)
 
     def read(self, size: int = -1):
@@ -149,6 +213,10 @@ class StreamerReader(StreamBaseIO):
         # Additional method required for unpickling Python objects
         return self.buffer.readline(size)
 
+    def copy_to(self, writer: Any, buffer_size: int = COPY_BUFFER_SIZE) -> int:
+        """Copy the remaining contents of the buffer into the writer."""
+        return copy_stream(self.buffer, writer, buffer_size)
+
     def close(self) -> None:
         """Close the writer."""
         self.buffer.close()
@@ -172,7 +240,10 @@ class StringToBytesClientReader(StreamerReader):
     def _load(self):
         # interacts with the client in terms of bytes
         with self.client:
+            preallocated = _preallocate(self.inner_buffer, _get_size(self.client))
             self.client.get(self.inner_buffer)
+        if preallocated:
+            self.inner_buffer.truncate()
         self.buffer.seek(0)
 
 
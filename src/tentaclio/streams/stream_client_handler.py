@@ -17,10 +17,16 @@ StreamerFactory = Callable[..., ContextManager[base_stream.Streamer]]
 __all__ = ["StreamURLHandler"]
 
 
+# Binary modes accepted by open, checked before falling back to a substring search.
+_BYTES_MODES = frozenset(("rb", "wb", "ab", "xb", "rb+", "wb+", "ab+", "xb+", "r+b", "w+b", "a+b"))
+
+
 def _is_bytes_mode(mode: str) -> bool:
-    if "b" in str(mode):
+    if mode in _BYTES_MODES:
         return True
-    return False
+    if isinstance(mode, str):
+        return "b" in mode
+    return "b" in str(mode)
 
 
 class StreamURLHandler:
@@ -1,21 +1,47 @@
 import copy
+import dataclasses
+import datetime
 import io
 import json
+import os
+import pickle
+import re
 import tempfile
+import threading
+import time
+from concurrent import futures
+from typing import Any, Dict
 
+import httplib2
 import pytest
+from googleapiclient.errors import HttpError
 
 from tentaclio import urls
-from tentaclio.clients import GoogleDriveFSClient
+from tentaclio.clients import GoogleDriveFSClient, google_drive_client
 from tentaclio.clients.google_drive_client import (
+    DOWNLOAD_CHUNK_SIZE,
+    DRIVE_ROOT_WORKERS,
+    DRIVES_CACHE_TTL,
+    PREFETCH_WORKERS,
     _CreateRequest,
+    _DownloadRequest,
+    _FileTable,
     _get_drive_root,
     _get_random_parent,
+    _get_service,
+    _GoogleDriveDescriptor,
     _GoogleFileDescriptor,
     _ListDrivesRequest,
     _ListFilesRequest,
     _load_credentials,
+    _refresh_in_background,
+    _schedule_refresh,
     _UpdateRequest,
+    _DescriptorCache,
+    _ThreadLocalHttp,
+    _build_service,
+    _name_query,
+    _q_escape,
     _get_default_token_file
 )
 
@@ -62,6 +88,7 @@ def file_descriptor():
         parents=["0"],
         url=urls.URL("gdrive://My Drive/"),
         mime_type="application/thingy",
+        size=None,
     )
 
 
@@ -73,6 +100,7 @@ def folder_descriptor():
         parents=["0"],
         url=urls.URL("gdrive://My Drive/"),
         mime_type=_GoogleFileDescriptor.FOLDER_MIME_TYPE,
+        size=None,
     )
 
 
@@ -133,6 +161,235 @@ def test_load_refreshing(mocker, token_file):
     assert creds == {"token": "refreshed"}
 
 
+@pytest.fixture
+def clear_service_cache():
+    _build_service.cache_clear()
+    yield
+    _build_service.cache_clear()
+
+
+def test_refresh_service_reuses_service(mocker, token_file, clear_service_cache):
+    mocked_load = mocker.patch("tentaclio.clients.google_drive_client._load_credentials")
+    mocked_build = mocker.patch("tentaclio.clients.google_drive_client.build")
+
+    services = []
+    for _ in range(2):
+        client = GoogleDriveFSClient("gdrive:///My Drive/")
+        client._refresh_service(token_file)
+        services.append(client._service)
+
+    mocked_load.assert_called_with(token_file)
+    mocked_build.assert_called_once()
+    assert services[0] is services[1]
+    assert mocked_build.mock_calls[0][2]["cache_discovery"] is False
+
+
+def test_get_service_once_across_threads(mocker, token_file, clear_service_cache):
+    mocked_load = mocker.patch("tentaclio.clients.google_drive_client._load_credentials")
+    mocked_build = mocker.patch("tentaclio.clients.google_drive_client.build")
+
+    def slow_build(*args, **kwargs):
+        time.sleep(0.01)
+        return mocker.MagicMock()
+
+    mocked_build.side_effect = slow_build
+
+    with futures.ThreadPoolExecutor(max_workers=4) as executor:
+        services = list(executor.map(lambda _: _get_service(token_file), range(4)))
+
+    mocked_build.assert_called_once()
+    assert all(service is services[0] for service in services)
+    assert mocked_load.call_count == 4
+
+
+def test_thread_local_http(mocker):
+    authorized_http = mocker.patch("tentaclio.clients.google_drive_client.AuthorizedHttp")
+    authorized_http.side_effect = lambda *args, **kwargs: mocker.MagicMock()
+    http = _ThreadLocalHttp(mocker.MagicMock())
+    main_http = http.http
+    assert http.http is main_http
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(http.http))
+    thread.start()
+    thread.join()
+    assert other[0] is not main_http
+
+
+def test_thread_local_http_request(mocker):
+    authorized_http = mocker.patch("tentaclio.clients.google_drive_client.AuthorizedHttp")
+    creds = mocker.MagicMock()
+    http = _ThreadLocalHttp(creds)
+    http.request("uri", "GET")
+
+    assert authorized_http.call_args[0][0] is creds
+    authorized_http.return_value.request.assert_called_once_with("uri", "GET")
+
+
+def test_refresh_service_bad_token_file(clear_service_cache):
+    client = GoogleDriveFSClient("gdrive:///My Drive/")
+    with pytest.raises(ValueError, match="Token file is not valid"):
+        client._refresh_service("not_a_valid_file")
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    (("file", "file"), ("it's", "it\\'s"), ("back\\slash", "back\\\\slash"),),
+)
+def test_q_escape(value, expected):
+    assert _q_escape(value) == expected
+
+
+def test_name_query():
+    assert _name_query("it's", "parent") == (
+        "name = 'it\\'s' and 'parent' in parents and trashed = false"
+    )
+    assert _name_query("it's") == "name = 'it\\'s' and trashed = false"
+
+
+def test_load_credentials_cached(mocker, token_file):
+    mocked_creds = mocker.patch("tentaclio.clients.google_drive_client.Credentials")
+    mocked_creds.return_value.valid = True
+    mocker.patch.dict("tentaclio.clients.google_drive_client._CREDENTIALS_CACHE", clear=True)
+
+    creds = _load_credentials(token_file)
+    assert _load_credentials(token_file) is creds
+    mocked_creds.assert_called_once()
+
+
+def test_load_credentials_token_file_changed(mocker, token_file):
+    mocked_creds = mocker.patch("tentaclio.clients.google_drive_client.Credentials")
+    mocked_creds.return_value.valid = True
+    mocker.patch.dict("tentaclio.clients.google_drive_client._CREDENTIALS_CACHE", clear=True)
+
+    _load_credentials(token_file)
+    stat = os.stat(token_file)
+    os.utime(token_file, (stat.st_atime, stat.st_mtime + 10))
+    _load_credentials(token_file)
+
+    assert mocked_creds.call_count == 2
+
+
+def test_load_credentials_cached_refreshed(mocker, token_file):
+    mocked_creds = mocker.patch("tentaclio.clients.google_drive_client.Credentials")
+    mocked_creds.return_value.valid = True
+    mocked_creds.return_value.to_json.return_value = '{"token": "refreshed"}'
+    mocker.patch.dict("tentaclio.clients.google_drive_client._CREDENTIALS_CACHE", clear=True)
+
+    creds = _load_credentials(token_file)
+    # the cached credentials expire
+    creds.valid = False
+    creds.refresh_token = "refresh"
+
+    assert _load_credentials(token_file) is creds
+    creds.refresh.assert_called_once()
+    mocked_creds.assert_called_once()
+    # the cache is still valid after writing the refreshed token
+    creds.valid = True
+    assert _load_credentials(token_file) is creds
+
+
+@pytest.fixture
+def refresh_timers(mocker):
+    timer = mocker.patch("tentaclio.clients.google_drive_client.threading.Timer")
+    timer.return_value.is_alive.return_value = True
+    mocker.patch.dict("tentaclio.clients.google_drive_client._REFRESH_TIMERS", clear=True)
+    return timer
+
+
+def test_schedule_refresh(mocker, refresh_timers):
+    creds = mocker.MagicMock()
+    creds.expiry = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+
+    _schedule_refresh("token_file", creds)
+    _schedule_refresh("token_file", creds)
+
+    refresh_timers.assert_called_once()
+    delay = refresh_timers.call_args[0][0]
+    assert 3000 < delay <= 3300
+    assert refresh_timers.return_value.daemon is True
+    refresh_timers.return_value.start.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "expiry",
+    (None, datetime.datetime.utcnow() + datetime.timedelta(minutes=1)),
+)
+def test_schedule_refresh_not_needed(mocker, refresh_timers, expiry):
+    creds = mocker.MagicMock()
+    creds.expiry = expiry
+
+    _schedule_refresh("token_file", creds)
+
+    refresh_timers.assert_not_called()
+
+
+def test_schedule_refresh_replaces_older_credentials(mocker, refresh_timers):
+    expiry = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    old_creds = mocker.MagicMock(expiry=expiry)
+    new_creds = mocker.MagicMock(expiry=expiry)
+
+    _schedule_refresh("token_file", old_creds)
+    _schedule_refresh("token_file", new_creds)
+
+    assert refresh_timers.call_count == 2
+    refresh_timers.return_value.cancel.assert_called_once()
+    assert refresh_timers.call_args[1]["args"] == ("token_file", new_creds)
+
+
+def test_load_credentials_schedules_refresh_from_file_expiry(mocker, refresh_timers):
+    mocker.patch.dict("tentaclio.clients.google_drive_client._CREDENTIALS_CACHE", clear=True)
+    expiry = datetime.datetime.utcnow().replace(microsecond=0) + datetime.timedelta(hours=1)
+    state = {"token": "toktok", "refresh_token": "refresh", "expiry": expiry.isoformat() + "Z"}
+    with tempfile.NamedTemporaryFile("w", suffix=".json") as f:
+        json.dump(state, f)
+        f.flush()
+
+        creds = _load_credentials(f.name)
+
+    assert creds.expiry == expiry
+    refresh_timers.assert_called_once()
+
+
+def test_refresh_in_background_token_file_replaced(mocker, refresh_timers, token_file):
+    creds = mocker.MagicMock()
+    mocker.patch.dict(
+        "tentaclio.clients.google_drive_client._CREDENTIALS_CACHE",
+        {token_file: (os.path.getmtime(token_file), mocker.MagicMock())},
+        clear=True,
+    )
+
+    _refresh_in_background(token_file, creds)
+
+    creds.refresh.assert_not_called()
+    with open(token_file) as f:
+        assert json.load(f) == {"token": "toktok"}
+
+
+def test_refresh_in_background(mocker, refresh_timers, token_file):
+    mocker.patch.dict("tentaclio.clients.google_drive_client._CREDENTIALS_CACHE", clear=True)
+    creds = mocker.MagicMock()
+    creds.to_json.return_value = '{"token": "refreshed"}'
+    creds.expiry = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+
+    _refresh_in_background(token_file, creds)
+
+    creds.refresh.assert_called_once()
+    with open(token_file) as f:
+        assert json.load(f) == {"token": "refreshed"}
+    # and the next refresh is scheduled
+    refresh_timers.assert_called_once()
+
+
+def test_refresh_in_background_error(mocker, refresh_timers, token_file):
+    creds = mocker.MagicMock()
+    creds.refresh.side_effect = Exception("no network")
+
+    _refresh_in_background(token_file, creds)
+
+    refresh_timers.assert_not_called()
+
+
 class TestGoogleDriveFSClient:
     @pytest.fixture
     def client(self, mocker, file_descriptor):
@@ -160,6 +417,10 @@ class TestGoogleDriveFSClient:
         assert client.drive_name == drive
         assert client.path_parts == path_parts
 
+    def test_default_drive_descriptor_url(self):
+        root = GoogleDriveFSClient.DEFAULT_DRIVE_DESCRIPTOR.root_descriptor
+        assert str(root.url) == "gdrive:/My Drive/"
+
     def test_parse_path_empty(self):
         with pytest.raises(ValueError):
             GoogleDriveFSClient("googledrive://")
@@ -190,6 +451,63 @@ class TestGoogleDriveFSClient:
         with pytest.raises(IOError), client:
             client.scandir()
 
+    @pytest.fixture
+    def id_client(self, mocker):
+        client = GoogleDriveFSClient("gdrive:///My Drive/?id=123")
+        client._service = mocker.MagicMock()
+        client._get_path_descriptors = mocker.MagicMock()
+        return client
+
+    def test_parse_file_id(self, id_client):
+        assert id_client.drive_name == "My Drive"
+        assert id_client.path_parts == ()
+        assert id_client.file_id == "123"
+        assert GoogleDriveFSClient("gdrive:///My Drive/file").file_id is None
+
+    def test_leaf_descriptor_by_id(self, id_client, file_props):
+        get = id_client._service.files.return_value.get
+        get.return_value.execute.return_value = dict(file_props, size="10")
+
+        descriptor = id_client._get_leaf_descriptor()
+
+        assert descriptor.id_ == file_props["id"]
+        assert descriptor.size == 10
+        assert descriptor.url == id_client.url
+        assert get.call_args[1]["fileId"] == "123"
+        assert get.call_args[1]["supportsAllDrives"] is True
+        # the path isn't walked
+        id_client._get_path_descriptors.assert_not_called()
+        assert id_client._get_leaf_descriptor() is descriptor
+        assert get.call_count == 1
+
+    def test_leaf_descriptor_by_id_not_found(self, id_client):
+        get = id_client._service.files.return_value.get
+        get.return_value.execute.side_effect = HttpError(httplib2.Response({"status": 404}), b"")
+
+        with pytest.raises(IOError, match="not found"):
+            id_client._get_leaf_descriptor()
+
+    def test_put_by_id_not_found(self, mocker, id_client):
+        id_client._get_leaf_descriptor = mocker.MagicMock(side_effect=IOError("not found"))
+        id_client._create = mocker.MagicMock()
+
+        with pytest.raises(IOError):
+            id_client.put(io.BytesIO(b"hello"))
+
+        id_client._create.assert_not_called()
+
+    def test_scandir_by_id(self, mocker, id_client, folder_descriptor, file_props):
+        execute = id_client._service.files.return_value.list.return_value.execute
+        execute.return_value = {"files": [dict(file_props, id="7")]}
+        id_client._get_leaf_descriptor = mocker.MagicMock(return_value=folder_descriptor)
+
+        with id_client:
+            entries = list(id_client.scandir())
+
+        assert entries[0].id_ == "7"
+        # named after the path, addressed by id
+        assert str(entries[0].url) == "gdrive:/My Drive/file?id=7"
+
     def test_remove(self, client, file_descriptor):
 
         client.remove()
@@ -197,6 +515,13 @@ class TestGoogleDriveFSClient:
         kwargs = client._service.files.return_value.delete.mock_calls[0][2]
         assert kwargs["fileId"] == file_descriptor.id_
 
+    def test_remove_invalidates_cache(self, mocker, client, file_descriptor):
+        cache = mocker.patch("tentaclio.clients.google_drive_client._DESCRIPTORS_CACHE")
+
+        client.remove()
+
+        cache.discard.assert_called_once_with(client._service, file_descriptor.id_)
+
     def test_remove_not_found(self, client):
 
         client._get_leaf_descriptor.side_effect = [IOError("test error")]
@@ -225,6 +550,48 @@ class TestGoogleDriveFSClient:
         buff.seek(0)
         assert buff.getvalue() == data
 
+    def test_download_stale_descriptor(self, mocker, client, file_descriptor):
+        moved = dataclasses.replace(file_descriptor, id_="moved")
+        client._get_leaf_descriptor.side_effect = [file_descriptor, moved]
+        download = mocker.patch("tentaclio.clients.google_drive_client._DownloadRequest")
+        download.return_value.execute.side_effect = [
+            HttpError(httplib2.Response({"status": 404}), b""),
+            None,
+        ]
+        cache = mocker.patch("tentaclio.clients.google_drive_client._DESCRIPTORS_CACHE")
+
+        client.get(io.BytesIO())
+
+        cache.discard.assert_called_once_with(client._service, file_descriptor.id_)
+        assert download.call_args[0][1] == "moved"
+
+    def test_put_stale_descriptor_created(self, mocker, client, file_descriptor):
+        client._get_leaf_descriptor.side_effect = [file_descriptor, IOError("not found")]
+
+        def update(descriptor, reader):
+            reader.read()
+            raise HttpError(httplib2.Response({"status": 404}), b"")
+
+        client._update = mocker.MagicMock(side_effect=update)
+        client._create = mocker.MagicMock()
+        reader = io.BytesIO(b"hello")
+
+        client.put(reader)
+
+        client._create.assert_called_once_with(reader)
+        # rewound for the retry
+        assert reader.tell() == 0
+
+    def test_put_stale_descriptor_not_seekable(self, mocker, client):
+        client._update = mocker.MagicMock(
+            side_effect=HttpError(httplib2.Response({"status": 404}), b"")
+        )
+        reader = mocker.MagicMock()
+        reader.seekable.return_value = False
+
+        with pytest.raises(HttpError):
+            client.put(reader)
+
     def test_create_new_file_folder_not_found(self, mocker, client):
         client._get_path_descriptors.side_effect = [IOError("test error")]
         with pytest.raises(IOError, match="test error"), client:
@@ -261,6 +628,34 @@ class TestGoogleDriveFSClient:
             client.put(reader)
         client._create.assert_called_once()
 
+    def test_get_drives_cached(self, mocker):
+        lister = mocker.patch("tentaclio.clients.google_drive_client._ListDrivesRequest")
+        lister.return_value.list.return_value = []
+        mocker.patch.dict("tentaclio.clients.google_drive_client._DRIVES_CACHE", clear=True)
+        service = mocker.MagicMock()
+
+        for _ in range(2):
+            client = GoogleDriveFSClient("gdrive:///My Drive/file")
+            client._service = service
+            drives = client._get_drives()
+
+        lister.assert_called_once_with(service)
+        assert drives == {"My Drive": GoogleDriveFSClient.DEFAULT_DRIVE_DESCRIPTOR}
+
+    def test_get_drives_cache_expired(self, mocker):
+        lister = mocker.patch("tentaclio.clients.google_drive_client._ListDrivesRequest")
+        lister.return_value.list.return_value = []
+        mocker.patch.dict("tentaclio.clients.google_drive_client._DRIVES_CACHE", clear=True)
+        mocked_time = mocker.patch("tentaclio.clients.google_drive_client.time")
+        mocked_time.monotonic.side_effect = [0, DRIVES_CACHE_TTL + 1]
+
+        client = GoogleDriveFSClient("gdrive:///My Drive/file")
+        client._service = mocker.MagicMock()
+        client._get_drives()
+        client._get_drives()
+
+        assert lister.call_count == 2
+
     def test_get_leaf_descriptor(self, mocker, file_descriptor):
         file_descriptor_leaf = copy.copy(file_descriptor)
         file_descriptor_leaf.id_ = "leaf"
@@ -276,6 +671,51 @@ class TestGoogleDriveFSClient:
         leaf = client._get_leaf_descriptor()
         assert leaf.id_ == "leaf"
 
+    def test_size(self, client, file_descriptor):
+        client._get_leaf_descriptor.return_value = dataclasses.replace(file_descriptor, size=5)
+        assert client.size == 5
+
+    def test_size_not_connected(self, client):
+        client._service = None
+        assert client.size is None
+        client._get_leaf_descriptor.assert_not_called()
+
+    def test_size_not_found(self, client):
+        client._get_leaf_descriptor.side_effect = [IOError("🤷")]
+        with pytest.raises(IOError):
+            client.size
+
+    def test_get_leaf_descriptor_memoized(self, mocker, folder_descriptor, file_descriptor):
+        client = GoogleDriveFSClient("gdrive:///My Drive/file")
+        client._get_path_descriptors = mocker.MagicMock()
+        client._get_path_descriptors.return_value = [folder_descriptor, file_descriptor]
+
+        assert client._get_leaf_descriptor() == file_descriptor
+        assert client._get_leaf_descriptor() == file_descriptor
+        client._get_path_descriptors.assert_called_once_with()
+
+    def test_remove_forgets_leaf_descriptor(self, mocker, file_descriptor):
+        client = GoogleDriveFSClient("gdrive:///My Drive/file")
+        client._service = mocker.MagicMock()
+        client._get_path_descriptors = mocker.MagicMock()
+        client._get_path_descriptors.return_value = [file_descriptor]
+
+        client.remove()
+        client._get_leaf_descriptor()
+
+        assert client._get_path_descriptors.call_count == 2
+
+    def test_put_create_forgets_leaf_descriptor(self, mocker, file_descriptor):
+        client = GoogleDriveFSClient("gdrive:///My Drive/file")
+        client._leaf_descriptor = file_descriptor
+        client._update = mocker.MagicMock(side_effect=IOError("gone"))
+        client._create = mocker.MagicMock()
+
+        client.put(mocker.MagicMock())
+
+        client._create.assert_called_once()
+        assert client._leaf_descriptor is None
+
     def test_get_file_descriptor_by_name_found_with_parent(
         self, client, mocked_service, file_props
     ):
@@ -295,6 +735,17 @@ class TestGoogleDriveFSClient:
         kwargs = mocked_service.files.return_value.list.mock_calls[0][2]
         assert "parent" not in kwargs["q"]
 
+    def test_get_file_descriptor_by_name_first_page_only(self, client, mocker, file_props):
+        client._service = mocker.MagicMock()
+        client._service.files.return_value.list.return_value.execute.side_effect = [
+            {"files": [file_props], "nextPageToken": "more"},
+            {"files": []},
+        ]
+        f = client._get_file_descriptor_by_name("name", None)
+
+        assert f.id_ == file_props["id"]
+        assert client._service.files.return_value.list.return_value.execute.call_count == 1
+
     def test_get_file_descriptor_by_name_not_found(self, client, mocked_service, file_props):
         client._service = mocked_service
         client._service.files.return_value.list.return_value.execute.return_value = {"files": []}
@@ -310,6 +761,7 @@ class TestGoogleDriveFSClient:
                 parents=[1],
                 mime_type=_GoogleFileDescriptor.FOLDER_MIME_TYPE,
                 url="gdrive://My Drive/folder",
+                size=None,
             ),
             _GoogleFileDescriptor(
                 id_=3,
@@ -317,6 +769,7 @@ class TestGoogleDriveFSClient:
                 parents=[2],
                 mime_type=_GoogleFileDescriptor.FOLDER_MIME_TYPE,
                 url="gdrive://My Drive/folder/inner",
+                size=None,
             ),
         ]
 
@@ -326,27 +779,386 @@ class TestGoogleDriveFSClient:
         ids = [d.id_ for d in descriptors]
         assert ids == ["root", 2, 3]
 
+    def test_path_parts_to_descriptors_cached(self, client, mocker, folder_descriptor):
+        mocker.patch(
+            "tentaclio.clients.google_drive_client._DESCRIPTORS_CACHE", _DescriptorCache(10)
+        )
+        client._get_file_descriptor_by_name = mocker.MagicMock()
+        client._get_file_descriptor_by_name.return_value = folder_descriptor
+
+        for _ in range(2):
+            descriptors = client._path_parts_to_descriptors(
+                GoogleDriveFSClient.DEFAULT_DRIVE_DESCRIPTOR, ["folder"]
+            )
+
+        client._get_file_descriptor_by_name.assert_called_once_with("folder", "root")
+        assert descriptors[-1] == folder_descriptor
+
+    def test_path_parts_to_descriptors_query_too_large(self, client, mocker, folder_descriptor):
+        mocker.patch(
+            "tentaclio.clients.google_drive_client._DESCRIPTORS_CACHE", _DescriptorCache(10)
+        )
+        execute = client._service.files.return_value.list.return_value.execute
+        execute.return_value = {"files": [], "nextPageToken": "more"}
+        client._get_file_descriptor_by_name = mocker.MagicMock()
+        client._get_file_descriptor_by_name.return_value = folder_descriptor
+
+        client._path_parts_to_descriptors(
+            GoogleDriveFSClient.DEFAULT_DRIVE_DESCRIPTOR, ["folder", "inner", "leaf"]
+        )
+
+        # the parts are looked up one by one, the query isn't repeated
+        assert execute.call_count == 1
+        assert client._get_file_descriptor_by_name.call_count == 3
+        client._service.new_batch_http_request.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "files",
+        (
+            [],
+            # the inner folder isn't under the first one
+            [
+                {"id": "2", "name": "folder", "parents": ["1"], "mimeType": "folder"},
+                {"id": "4", "name": "inner", "parents": ["5"], "mimeType": "folder"},
+            ],
+        ),
+    )
+    def test_path_parts_to_descriptors_query_not_found(self, client, mocker, files):
+        mocker.patch(
+            "tentaclio.clients.google_drive_client._DESCRIPTORS_CACHE", _DescriptorCache(10)
+        )
+        execute = client._service.files.return_value.list.return_value.execute
+        execute.return_value = {"files": files}
+        client._get_file_descriptor_by_name = mocker.MagicMock()
+
+        with pytest.raises(IOError, match="Descriptor not found"):
+            client._path_parts_to_descriptors(
+                GoogleDriveFSClient.DEFAULT_DRIVE_DESCRIPTOR, ["folder", "inner"]
+            )
+
+        assert execute.call_count == 1
+        client._get_file_descriptor_by_name.assert_not_called()
+
+    def test_path_parts_to_descriptors_single_query(self, client, mocker):
+        mocker.patch(
+            "tentaclio.clients.google_drive_client._DESCRIPTORS_CACHE", _DescriptorCache(10)
+        )
+        files = [
+            {"id": "4", "name": "inner", "parents": ["5"], "mimeType": "folder"},
+            {"id": "3", "name": "inner", "parents": ["2"], "mimeType": "folder"},
+            {"id": "2", "name": "folder", "parents": ["1"], "mimeType": "folder"},
+            {"id": "6", "name": "leaf", "parents": ["3"], "mimeType": "file"},
+        ]
+        client._service.files.return_value.list.return_value.execute.return_value = {
+            "files": files
+        }
+        client._get_file_descriptor_by_name = mocker.MagicMock()
+
+        descriptors = client._path_parts_to_descriptors(
+            GoogleDriveFSClient.DEFAULT_DRIVE_DESCRIPTOR, ["folder", "inner", "leaf"]
+        )
+
+        assert [d.id_ for d in descriptors] == ["root", "2", "3", "6"]
+        kwargs = client._service.files.return_value.list.call_args[1]
+        assert kwargs["q"] == (
+            "(name = 'folder' and 'root' in parents and trashed = false) or "
+            "(name = 'inner' and trashed = false) or "
+            "(name = 'leaf' and trashed = false)"
+        )
+        client._get_file_descriptor_by_name.assert_not_called()
+
+    def test_query_path_candidates_with_parent(self, client):
+        client._service.files.return_value.list.return_value.execute.return_value = {
+            "files": []
+        }
+
+        candidates = client._query_path_candidates("1", ["folder", "inner"])
+
+        assert candidates == [[], []]
+        kwargs = client._service.files.return_value.list.call_args[1]
+        assert kwargs["q"] == (
+            "(name = 'folder' and '1' in parents and trashed = false) or "
+            "(name = 'inner' and trashed = false)"
+        )
+
+    @pytest.fixture
+    def shared_drive(self, mocker, folder_descriptor):
+        mocker.patch.dict("tentaclio.clients.google_drive_client._DRIVE_TREES_CACHE", clear=True)
+        mocker.patch(
+            "tentaclio.clients.google_drive_client._DESCRIPTORS_CACHE", _DescriptorCache(10)
+        )
+        return _GoogleDriveDescriptor(
+            id_="drive",
+            name="Shared",
+            root_descriptor=dataclasses.replace(folder_descriptor, id_="drive"),
+        )
+
+    def test_path_parts_to_descriptors_drive_tree(self, client, mocker, shared_drive):
+        files = [
+            {"id": "2", "name": "folder", "parents": ["drive"], "mimeType": "folder"},
+            {"id": "3", "name": "inner", "parents": ["2"], "mimeType": "folder"},
+            {"id": "4", "name": "inner", "parents": ["drive"], "mimeType": "folder"},
+        ]
+        execute = client._service.files.return_value.list.return_value.execute
+        execute.return_value = {"files": files}
+        client._get_file_descriptor_by_name = mocker.MagicMock()
+
+        for _ in range(2):
+            descriptors = client._path_parts_to_descriptors(shared_drive, ["folder", "inner"])
+
+        assert [d.id_ for d in descriptors] == ["drive", "2", "3"]
+        assert execute.call_count == 1
+        kwargs = client._service.files.return_value.list.call_args[1]
+        assert kwargs["driveId"] == "drive"
+        assert kwargs["corpora"] == "drive"
+        assert kwargs["fields"] == "nextPageToken, files(id, name, mimeType, parents, size)"
+        client._get_file_descriptor_by_name.assert_not_called()
+
+    def test_path_parts_to_descriptors_single_part_not_listed(
+        self, client, mocker, shared_drive
+    ):
+        client._get_file_descriptor_by_name = mocker.MagicMock()
+        client._get_file_descriptor_by_name.return_value = shared_drive.root_descriptor
+
+        client._path_parts_to_descriptors(shared_drive, ["folder"])
+
+        client._service.files.return_value.list.assert_not_called()
+        client._get_file_descriptor_by_name.assert_called_once_with("folder", "drive")
+
+    def test_path_parts_to_descriptors_drive_too_large(self, client, mocker, shared_drive):
+        execute = client._service.files.return_value.list.return_value.execute
+        execute.return_value = {"files": [], "nextPageToken": "more"}
+        client._get_file_descriptor_by_name = mocker.MagicMock()
+        client._get_file_descriptor_by_name.return_value = shared_drive.root_descriptor
+
+        for _ in range(2):
+            client._path_parts_to_descriptors(shared_drive, ["folder", "inner"])
+
+        # the drive is listed once, then the lookups go by name
+        tree_listings = [
+            call
+            for call in client._service.files.return_value.list.call_args_list
+            if "driveId" in call[1]
+        ]
+        assert len(tree_listings) == 1
+
+    def test_path_parts_to_descriptors_cache_scoped_to_drive(
+        self, client, mocker, shared_drive, folder_descriptor
+    ):
+        other = dataclasses.replace(folder_descriptor, id_="other")
+        client._get_file_descriptor_by_name = mocker.MagicMock()
+        client._get_file_descriptor_by_name.side_effect = [folder_descriptor, other]
+        # the drive is too large for a tree
+        execute = client._service.files.return_value.list.return_value.execute
+        execute.return_value = {"files": [], "nextPageToken": "more"}
+
+        my_drive = client._path_parts_to_descriptors(
+            GoogleDriveFSClient.DEFAULT_DRIVE_DESCRIPTOR, ["folder"]
+        )
+        shared = client._path_parts_to_descriptors(shared_drive, ["folder"])
+
+        assert my_drive[-1].id_ == folder_descriptor.id_
+        assert shared[-1].id_ == "other"
+        assert client._get_file_descriptor_by_name.call_args_list == [
+            mocker.call("folder", "root"),
+            mocker.call("folder", "drive"),
+        ]
+
+    def test_query_path_candidates_repeated_first_name(self, client):
+        files = [{"id": "2", "name": "a", "parents": ["9"], "mimeType": "folder"}]
+        client._service.files.return_value.list.return_value.execute.return_value = {
+            "files": files
+        }
+
+        candidates = client._query_path_candidates("1", ["a", "b", "a"])
+
+        # the match may come from the last clause, which isn't restricted to the parent
+        assert candidates[0] is None
+        assert [d.id_ for d in candidates[2]] == ["2"]
+
+    @pytest.mark.parametrize("strategy", ("tree", "query", "sequential"))
+    def test_path_parts_to_descriptors_strategies_agree(self, client, shared_drive, strategy):
+        # names repeat across parents, only one chain hangs from the drive root
+        files = [
+            {"id": "b", "name": "folder", "parents": ["elsewhere"], "mimeType": "folder"},
+            {"id": "a", "name": "folder", "parents": ["drive"], "mimeType": "folder"},
+            {"id": "ib", "name": "inner", "parents": ["b"], "mimeType": "folder"},
+            {"id": "id", "name": "inner", "parents": ["drive"], "mimeType": "folder"},
+            {"id": "ia", "name": "inner", "parents": ["a"], "mimeType": "folder"},
+        ]
+        client._service = FakeDriveService(files, strategy)
+
+        descriptors = client._path_parts_to_descriptors(shared_drive, ["folder", "inner"])
+
+        assert [d.id_ for d in descriptors] == ["drive", "a", "ia"]
+        assert client._service.strategies_used == {strategy}
+
+    def test_path_parts_to_descriptors_my_drive_not_listed(self, client, mocker, shared_drive):
+        client._get_file_descriptor_by_name = mocker.MagicMock()
+        client._get_file_descriptor_by_name.return_value = shared_drive.root_descriptor
+
+        client._path_parts_to_descriptors(GoogleDriveFSClient.DEFAULT_DRIVE_DESCRIPTOR, ["a"])
+
+        client._service.files.return_value.list.assert_not_called()
+
+    def test_remove_forgets_drive_trees(self, client, mocker):
+        other_service = object()
+        trees = {
+            (id(client._service), "drive"): (0, client._service, None),
+            (id(other_service), "drive"): (0, other_service, None),
+        }
+        mocker.patch.dict(google_drive_client._DRIVE_TREES_CACHE, trees, clear=True)
+
+        client.remove()
+
+        assert list(google_drive_client._DRIVE_TREES_CACHE) == [(id(other_service), "drive")]
+
+
+class FakeDriveService:
+    """Drive service answering name queries from a list of files.
+
+    Every lookup strategy but the given one fails or doesn't fit a page, so paths are
+    resolved with that one.
+    """
+
+    CLAUSE = re.compile(r"name = '([^']*)'(?: and '([^']*)' in parents)? and trashed = false")
+
+    def __init__(self, files, strategy):
+        self.all_files = files
+        self.strategy = strategy
+        self.strategies_used = set()
+
+    def files(self):
+        return self
+
+    def list(self, **kwargs):
+        return FakeDriveRequest(self, kwargs)
+
+    def _list(self, kwargs):
+        q = kwargs["q"]
+        if "driveId" in kwargs:
+            strategy = "tree"
+        elif " or " in q:
+            strategy = "query"
+        else:
+            strategy = "sequential"
+        if strategy != self.strategy:
+            # too large for the tree and the joined query
+            return {"files": [], "nextPageToken": "too many"} if strategy != "sequential" else {}
+        self.strategies_used.add(strategy)
+        if strategy == "tree":
+            return {"files": self.all_files}
+        # (name, parent) for every clause, the parent is empty if unrestricted
+        clauses = self.CLAUSE.findall(q)
+        return {
+            "files": [
+                f
+                for f in self.all_files
+                if any(
+                    f["name"] == name and (not parent or parent in f["parents"])
+                    for name, parent in clauses
+                )
+            ]
+        }
+
+
+class FakeDriveRequest:
+    def __init__(self, service, kwargs):
+        self.service = service
+        self.kwargs = kwargs
+
+    def execute(self):
+        return self.service._list(self.kwargs)
+
+
+class TestDescriptorCache:
+    def test_get_put(self, file_descriptor):
+        cache = _DescriptorCache(maxsize=10)
+        service = object()
+        cache.put(service, "parent", "file", file_descriptor)
+        assert cache.get(service, "parent", "file") == file_descriptor
+        assert cache.get(service, None, "file") is None
+        assert cache.get(object(), "parent", "file") is None
+
+    def test_evicts_least_recently_used(self, file_descriptor, folder_descriptor):
+        cache = _DescriptorCache(maxsize=2)
+        service = object()
+        cache.put(service, None, "a", file_descriptor)
+        cache.put(service, None, "b", folder_descriptor)
+        cache.get(service, None, "a")
+        cache.put(service, None, "c", folder_descriptor)
+        assert cache.get(service, None, "a") == file_descriptor
+        assert cache.get(service, None, "b") is None
+
+    def test_discard(self, file_descriptor, folder_descriptor):
+        cache = _DescriptorCache(maxsize=10)
+        service = object()
+        cache.put(service, None, "file", file_descriptor)
+        cache.put(service, None, "folder", folder_descriptor)
+        cache.discard(service, file_descriptor.id_)
+        assert cache.get(service, None, "file") is None
+        assert cache.get(service, None, "folder") == folder_descriptor
+
+    def test_discard_descendants(self, file_descriptor, folder_descriptor):
+        cache = _DescriptorCache(maxsize=10)
+        service = object()
+        cache.put(service, "root", "folder", folder_descriptor)
+        cache.put(service, folder_descriptor.id_, "file", file_descriptor)
+        cache.put(service, file_descriptor.id_, "inner", file_descriptor)
+        cache.discard(service, folder_descriptor.id_)
+        assert cache.get(service, folder_descriptor.id_, "file") is None
+        assert cache.get(service, file_descriptor.id_, "inner") is None
+
+    def test_expires(self, mocker, file_descriptor):
+        monotonic = mocker.patch("tentaclio.clients.google_drive_client.time.monotonic")
+        monotonic.return_value = 0
+        cache = _DescriptorCache(maxsize=10, ttl=60)
+        service = object()
+        cache.put(service, None, "file", file_descriptor)
+        monotonic.return_value = 59
+        assert cache.get(service, None, "file") == file_descriptor
+        monotonic.return_value = 60
+        assert cache.get(service, None, "file") is None
+
 
 class TestGoogleFileDescriptor:
+    def test_slots(self, file_descriptor):
+        assert not hasattr(file_descriptor, "__dict__")
+
+    def test_pickle(self, folder_descriptor):
+        drive = _GoogleDriveDescriptor(id_="1", name="drive", root_descriptor=folder_descriptor)
+        unpickled = pickle.loads(pickle.dumps(drive))
+        assert unpickled == drive
+        assert unpickled.root_descriptor.is_dir
+        assert not unpickled.root_descriptor.is_file
+
+    def test_deepcopy(self, file_descriptor):
+        copied = copy.deepcopy(file_descriptor)
+        assert copied == file_descriptor
+        assert copied.parents is not file_descriptor.parents
+        assert copied.is_file
+
     def test_is_dir(self):
-        args = dict(
+        args: Dict[str, Any] = dict(
             name="file",
             id_="123",
             mime_type=_GoogleFileDescriptor.FOLDER_MIME_TYPE,
             parents=[],
             url="googledrive:///root/",
+            size=None,
         )
         descriptor = _GoogleFileDescriptor(**args)
         assert descriptor.is_dir
         assert not descriptor.is_file
 
     def test_is_not_dir(self):
-        args = dict(
+        args: Dict[str, Any] = dict(
             name="file",
             id_="123",
             mime_type="application/other",
             parents=[],
             url="googledrive:///root/",
+            size=None,
         )
         descriptor = _GoogleFileDescriptor(**args)
         assert not descriptor.is_dir
@@ -365,6 +1177,46 @@ class TestCreateRequest:
         assert kwargs["media_body"].mimetype() == "text/plain"
 
 
+class TestDownloadRequest:
+    def test_execute_chunk_size(self, mocker):
+        media_download = mocker.patch("tentaclio.clients.google_drive_client.MediaIoBaseDownload")
+        media_download.return_value.next_chunk.return_value = (None, True)
+        service = mocker.MagicMock()
+        writer = io.BytesIO()
+
+        _DownloadRequest(service, "123", writer).execute()
+
+        kwargs = media_download.mock_calls[0][2]
+        assert kwargs["chunksize"] == DOWNLOAD_CHUNK_SIZE
+        assert DOWNLOAD_CHUNK_SIZE % (256 * 1024) == 0
+
+    def test_execute_custom_chunk_size(self, mocker):
+        media_download = mocker.patch("tentaclio.clients.google_drive_client.MediaIoBaseDownload")
+        media_download.return_value.next_chunk.return_value = (None, True)
+        service = mocker.MagicMock()
+
+        _DownloadRequest(service, "123", io.BytesIO(), chunk_size=1024 * 1024).execute()
+
+        kwargs = media_download.mock_calls[0][2]
+        assert kwargs["chunksize"] == 1024 * 1024
+
+
+class TestFileTable:
+    def test_columns(self, file_props):
+        folder = dict(file_props, id="2", mimeType=_GoogleFileDescriptor.FOLDER_MIME_TYPE)
+        table = _FileTable.from_files([dict(file_props, size="10"), folder])
+        assert len(table) == 2
+        assert table.names == ["file", "file"]
+        assert table.sizes == [10, None]
+        assert table.mime_types[1] is _GoogleFileDescriptor.FOLDER_MIME_TYPE
+
+    def test_getitem(self, file_props):
+        descriptor = _FileTable.from_files([file_props])[0]
+        assert descriptor.id_ == file_props["id"]
+        assert descriptor.parents == file_props["parents"]
+        assert descriptor.url is None
+
+
 class TestUpdateRequest:
     def test_execute(self, mocker):
         service = mocker.MagicMock()
@@ -379,21 +1231,52 @@ class TestUpdateRequest:
 class TestListFilesRequest:
     def test_build_descriptor(self, mocker, file_props):
         lister = _ListFilesRequest(mocker.Mock)
-        descriptor = next(lister._build_descriptors([file_props]))
+        descriptor = lister.build_descriptors([file_props])[0]
         assert descriptor.id_ == file_props["id"]
         assert descriptor.name == file_props["name"]
         assert descriptor.parents == file_props["parents"]
         assert descriptor.mime_type == file_props["mimeType"]
 
+    def test_build_descriptor_interns_mime_type(self, mocker, file_props):
+        lister = _ListFilesRequest(mocker.Mock)
+        folder_type = "".join(["application/", "vnd.google-apps.folder"])
+        descriptor = lister.build_descriptors([dict(file_props, mimeType=folder_type)])[0]
+        assert descriptor.mime_type is _GoogleFileDescriptor.FOLDER_MIME_TYPE
+        assert descriptor.is_dir
+
+    def test_build_descriptor_size(self, mocker, file_props):
+        lister = _ListFilesRequest(mocker.Mock)
+        descriptor = lister.build_descriptors([dict(file_props, size="1024")])[0]
+        assert descriptor.size == 1024
+        assert lister.build_descriptors([file_props])[0].size is None
+
     def test_build_descriptor_with_url(self, mocker, file_props):
         lister = _ListFilesRequest(mocker.Mock, url_base="googledrive://my drive/")
-        descriptor = next(lister._build_descriptors([file_props],))
+        descriptor = lister.build_descriptors([file_props])[0]
         assert descriptor.id_ == file_props["id"]
         assert descriptor.name == file_props["name"]
         assert descriptor.parents == file_props["parents"]
         assert descriptor.mime_type == file_props["mimeType"]
         assert str(descriptor.url) == "googledrive://my drive/file"
 
+    def test_args(self, mocker):
+        lister = _ListFilesRequest(mocker.Mock)
+        assert lister.args["pageSize"] == 1000
+        assert lister.args["fields"] == "nextPageToken, files(id, name, mimeType, parents, size)"
+
+    def test_args_custom(self, mocker):
+        lister = _ListFilesRequest(mocker.Mock, fields="files(id)", pageSize="1")
+        assert lister.args["pageSize"] == "1"
+        assert lister.args["fields"] == "nextPageToken, files(id)"
+
+    def test_args_not_shared(self, mocker):
+        lister = _ListFilesRequest(mocker.Mock, q="name = 'a'")
+        lister.args["pageToken"] = "token"
+        other = _ListFilesRequest(mocker.Mock)
+        assert "pageToken" not in other.args
+        assert "q" not in other.args
+        assert other.args["supportsTeamDrives"] is True
+
     def test_list_no_pagination(self, mocker, file_props, mocked_service):
         lister = _ListFilesRequest(mocked_service)
         results = list(lister.list())
@@ -416,6 +1299,68 @@ class TestListFilesRequest:
         assert results[0].id_ == file_props["id"]
         assert results[1].id_ == file_props_2["id"]
 
+    def test_list_prefetches_pages(self, mocker, file_props):
+        service = mocker.MagicMock()
+        pages = [
+            [dict(file_props, id=str(i)) for i in range(start, start + 3)] for start in (0, 3, 6)
+        ]
+        service.files.return_value.list.return_value.execute.side_effect = [
+            {"files": pages[0], "nextPageToken": "1"},
+            {"files": pages[1], "nextPageToken": "2"},
+            {"files": pages[2]},
+        ]
+        lister = _ListFilesRequest(service)
+
+        results = list(lister.list())
+
+        assert [result.id_ for result in results] == [str(i) for i in range(9)]
+        tokens = [
+            call[2].get("pageToken")
+            for call in service.files.return_value.list.mock_calls
+            if call[0] == ""
+        ]
+        assert tokens == [None, "1", "2"]
+        assert lister.args["pageToken"] is None
+
+    def test_list_fetches_next_page_while_consuming(self, mocker, file_props):
+        service = mocker.MagicMock()
+        second_page_requested = threading.Event()
+        pages = [
+            {"files": [dict(file_props, id=str(i)) for i in range(3)], "nextPageToken": "1"},
+            {"files": [dict(file_props, id="3")]},
+        ]
+
+        def execute():
+            if len(pages) == 1:
+                second_page_requested.set()
+            return pages.pop(0)
+
+        service.files.return_value.list.return_value.execute.side_effect = execute
+        results = iter(_ListFilesRequest(service).list())
+
+        assert [next(results).id_, next(results).id_] == ["0", "1"]
+        # the first page isn't exhausted yet
+        assert second_page_requested.wait(timeout=5)
+        assert [result.id_ for result in results] == ["2", "3"]
+
+    def test_list_prefetches_in_shared_threads(self, mocker, file_props):
+        service = mocker.MagicMock()
+        threads = set()
+
+        def execute():
+            threads.add(threading.current_thread().name)
+            if service.files.return_value.list.return_value.execute.call_count % 2:
+                return {"files": [file_props], "nextPageToken": "1"}
+            return {"files": [file_props]}
+
+        service.files.return_value.list.return_value.execute.side_effect = execute
+        for _ in range(3):
+            assert len(list(_ListFilesRequest(service).list())) == 2
+
+        prefetch_threads = threads - {threading.current_thread().name}
+        assert 1 <= len(prefetch_threads) <= PREFETCH_WORKERS
+        assert all(name.startswith("tentaclio-gdrive-prefetch") for name in prefetch_threads)
+
 
 class TestListDrivesRequest:
     def test_yielder(self, mocker, drive_props, file_descriptor):
@@ -432,6 +1377,43 @@ class TestListDrivesRequest:
         assert descriptor.name == drive_props["name"]
         assert descriptor.root_descriptor == file_descriptor
 
+    def test_yielder_many_drives(self, mocker, file_descriptor):
+        mocked_get_drive_root = mocker.patch(
+            "tentaclio.clients.google_drive_client._get_drive_root"
+        )
+        mocked_get_drive_root.return_value = file_descriptor
+        drives = [{"id": str(i), "name": f"drive {i}"} for i in range(20)]
+
+        service = mocker.MagicMock()
+        lister = _ListDrivesRequest(service)
+
+        descriptors = list(lister._yielder({"drives": drives}))
+        assert sorted(d.id_ for d in descriptors) == sorted(d["id"] for d in drives)
+        assert mocked_get_drive_root.call_count == len(drives)
+
+    def test_yielder_shared_threads(self, mocker, file_descriptor):
+        threads = set()
+
+        def get_drive_root(service, drive_id):
+            threads.add(threading.current_thread().name)
+            return file_descriptor
+
+        mocker.patch(
+            "tentaclio.clients.google_drive_client._get_drive_root", side_effect=get_drive_root
+        )
+        drives = [{"id": str(i), "name": f"drive {i}"} for i in range(20)]
+        lister = _ListDrivesRequest(mocker.MagicMock())
+
+        for _ in range(3):
+            assert len(list(lister._yielder({"drives": drives}))) == len(drives)
+
+        assert 1 <= len(threads) <= DRIVE_ROOT_WORKERS
+        assert all(name.startswith("tentaclio-gdrive-root") for name in threads)
+
+    def test_yielder_no_drives(self, mocker):
+        lister = _ListDrivesRequest(mocker.MagicMock())
+        assert list(lister._yielder({})) == []
+
     def test_yielder_permission_error(self, mocker, drive_props, file_descriptor):
         mocked_get_drive_root = mocker.patch(
             "tentaclio.clients.google_drive_client._get_drive_root"
@@ -461,9 +1443,15 @@ def test_get_random_parent_no_parents(mocker, file_props):
 
 def test_get_random_parent(mocker, file_props):
     service = mocker.MagicMock()
-    service.files.return_value.list.return_value.execute.return_value = {"files": [file_props]}
+    service.files.return_value.list.return_value.execute.return_value = {
+        "files": [file_props],
+        "nextPageToken": "more",
+    }
     parent = _get_random_parent(service, "drive")
     assert parent == file_props["parents"][0]
+    kwargs = service.files.return_value.list.mock_calls[0][2]
+    assert kwargs["pageSize"] == "1"
+    assert service.files.return_value.list.return_value.execute.call_count == 1
 
 
 def test_get_drive_root_parent_not_found(mocker):
@@ -492,6 +1480,101 @@ def test_get_drive_root(mocker, file_props, file_descriptor):
     assert descriptor.id_ == "root"
 
 
+def http_error(status):
+    return HttpError(httplib2.Response({"status": status}), b"")
+
+
+def batch_of(responses):
+    """Create a fake batch request class answering with the given responses.
+
+    Responses are looked up by request id when executing, exceptions are passed to the
+    callback as errors.
+    """
+
+    class FakeBatch:
+        def __init__(self, callback):
+            self.callback = callback
+            self.request_ids = []
+
+        def add(self, request, request_id):
+            self.request_ids.append(request_id)
+
+        def execute(self):
+            for request_id in self.request_ids:
+                response = responses.get(request_id)
+                error = response if isinstance(response, Exception) else None
+                self.callback(request_id, None if error else response, error)
+
+    return FakeBatch
+
+
+def test_get_drive_root_batched(mocker, file_props):
+    service = mocker.MagicMock()
+    root_props = {"id": "drive", "name": "Drive", "mimeType": "folder"}
+    service.new_batch_http_request.side_effect = batch_of(
+        {"root": root_props, "random": {"files": [file_props]}}
+    )
+
+    descriptor = _get_drive_root(service, "drive")
+
+    assert descriptor.id_ == "drive"
+    kwargs = service.files.return_value.get.call_args[1]
+    assert kwargs["fileId"] == "drive"
+    service.files.return_value.get.return_value.execute.assert_not_called()
+    service.files.return_value.list.return_value.execute.assert_not_called()
+
+
+def test_get_drive_root_batched_fallback(mocker, file_props):
+    service = mocker.MagicMock()
+    service.new_batch_http_request.side_effect = batch_of(
+        {"root": http_error(404), "random": {"files": [file_props]}}
+    )
+    root_props = {"id": "root", "name": "Drive", "mimeType": "folder"}
+    service.files.return_value.get.return_value.execute.side_effect = [root_props]
+
+    descriptor = _get_drive_root(service, "drive")
+
+    assert descriptor.id_ == "root"
+    kwargs = service.files.return_value.get.call_args[1]
+    assert kwargs["fileId"] == file_props["parents"][0]
+    # the random file came with the batch
+    service.files.return_value.list.return_value.execute.assert_not_called()
+
+
+def test_get_drive_root_batched_no_files(mocker):
+    service = mocker.MagicMock()
+    service.new_batch_http_request.side_effect = batch_of(
+        {"root": http_error(403), "random": {"files": []}}
+    )
+
+    with pytest.raises(IOError, match="No files found"):
+        _get_drive_root(service, "drive")
+
+
+@pytest.mark.parametrize(
+    "responses",
+    (
+        {"root": http_error(500), "random": {"files": []}},
+        {"root": http_error(404), "random": http_error(401)},
+    ),
+)
+def test_get_drive_root_batched_errors(mocker, responses):
+    service = mocker.MagicMock()
+    service.new_batch_http_request.side_effect = batch_of(responses)
+
+    with pytest.raises(HttpError):
+        _get_drive_root(service, "drive")
+
+
+def test_get_drive_root_batched_random_error_ignored(mocker):
+    service = mocker.MagicMock()
+    service.new_batch_http_request.side_effect = batch_of(
+        {"root": {"id": "root_id", "name": "Drive"}, "random": http_error(403)}
+    )
+
+    assert _get_drive_root(service, "drive").id_ == "root_id"
+
+
 def test_home_varible_set(mocker):
     """Test DEFAULT_TOKEN_FILE is correct."""
     env_dict = {"HOME": "/home"}
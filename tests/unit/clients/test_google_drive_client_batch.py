@@ -0,0 +1,111 @@
+import io
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from tentaclio.clients import google_drive_client_batch
+
+
+def http_error(status, content=b"{}"):
+    return HttpError(httplib2.Response({"status": status}), content)
+
+
+@pytest.fixture
+def mocked_client(mocker):
+    return mocker.patch("tentaclio.clients.google_drive_client_batch.GoogleDriveFSClient")
+
+
+@pytest.fixture
+def mocked_sleep(mocker):
+    return mocker.patch("tentaclio.clients.google_drive_client_batch.time.sleep")
+
+
+def test_put_many(mocked_client):
+    readers = {f"gdrive:///My Drive/file_{i}": io.BytesIO(b"hello") for i in range(20)}
+
+    google_drive_client_batch.put_many(readers.items(), max_concurrency=4)
+
+    # the first client only warms up the service and the drives
+    client = mocked_client.return_value.__enter__.return_value
+    client._get_drives.assert_called_once()
+    urls = sorted(call[0][0] for call in mocked_client.call_args_list[1:])
+    assert urls == sorted(readers)
+    assert client.put.call_count == 20
+
+
+def test_put_many_nothing(mocked_client):
+    google_drive_client_batch.put_many([])
+
+    mocked_client.assert_not_called()
+
+
+def test_put_many_retries_rate_limited(mocked_client, mocked_sleep):
+    reader = io.BytesIO(b"hello")
+    put = mocked_client.return_value.__enter__.return_value.put
+
+    def rate_limited_once(reader):
+        reader.read()
+        put.side_effect = None
+        raise http_error(429)
+
+    put.side_effect = rate_limited_once
+
+    google_drive_client_batch.put_many([("gdrive:///My Drive/file", reader)])
+
+    assert put.call_count == 2
+    mocked_sleep.assert_called_once()
+    # rewound for the second attempt
+    assert reader.tell() == 0
+
+
+def test_put_many_retries_user_rate_limit(mocked_client, mocked_sleep):
+    error = http_error(403, b'{"error": {"errors": [{"reason": "userRateLimitExceeded"}]}}')
+    put = mocked_client.return_value.__enter__.return_value.put
+    put.side_effect = [error, None]
+
+    google_drive_client_batch.put_many([("gdrive:///My Drive/file", io.BytesIO(b"hello"))])
+
+    assert put.call_count == 2
+
+
+def test_put_many_gives_up(mocked_client, mocked_sleep):
+    put = mocked_client.return_value.__enter__.return_value.put
+    put.side_effect = http_error(429)
+
+    with pytest.raises(HttpError):
+        google_drive_client_batch.put_many([("gdrive:///My Drive/file", io.BytesIO(b"hello"))])
+
+    assert put.call_count == google_drive_client_batch.MAX_ATTEMPTS
+
+
+def test_put_many_not_seekable_not_retried(mocked_client, mocked_sleep):
+    class Reader:
+        def read(self, size=-1):
+            return b""
+
+    put = mocked_client.return_value.__enter__.return_value.put
+    put.side_effect = http_error(429)
+
+    with pytest.raises(HttpError):
+        google_drive_client_batch.put_many([("gdrive:///My Drive/file", Reader())])
+
+    assert put.call_count == 1
+
+
+def test_put_many_other_errors_not_retried(mocked_client, mocked_sleep):
+    put = mocked_client.return_value.__enter__.return_value.put
+    put.side_effect = [http_error(404), None]
+
+    with pytest.raises(HttpError):
+        google_drive_client_batch.put_many(
+            [
+                ("gdrive:///My Drive/missing", io.BytesIO(b"hello")),
+                ("gdrive:///My Drive/file", io.BytesIO(b"hello")),
+            ],
+            max_concurrency=1,
+        )
+
+    # the remaining uploads still run
+    assert put.call_count == 2
+    mocked_sleep.assert_not_called()
@@ -1,5 +1,8 @@
 """Test of the GS Client."""
 import io
+import os
+import time
+from concurrent import futures
 
 import pytest
 import mock
@@ -181,6 +184,80 @@ def test_helper_put(m_connect, url, bucket, key):
     connection.bucket.return_value.blob.return_value.upload_from_file.assert_called_once()
 
 
+@mock.patch("tentaclio.clients.GSClient._connect")
+def test_helper_put_sized_reader(m_connect):
+    """Test the remaining size of seekable readers is passed on."""
+    stream = io.BytesIO(b"hello world")
+    stream.seek(6)
+    with gs_client.GSClient("gs://bucket/prefix") as client:
+        client._put(stream, bucket_name="bucket", key_name="prefix")
+
+    blob = m_connect.return_value.bucket.return_value.blob.return_value
+    blob.upload_from_file.assert_called_once_with(stream, size=5)
+    assert stream.tell() == 6
+
+
+@mock.patch("tentaclio.clients.GSClient._connect")
+def test_helper_put_unsized_reader(m_connect):
+    """Test readers without a known size are uploaded without it."""
+    stream = io.StringIO("hello")
+    with gs_client.GSClient("gs://bucket/prefix") as client:
+        client._put(stream, bucket_name="bucket", key_name="prefix")
+
+    blob = m_connect.return_value.bucket.return_value.blob.return_value
+    blob.upload_from_file.assert_called_once_with(stream, size=None)
+
+
+class RawWriter(io.RawIOBase):
+    def __init__(self):
+        self.data = bytearray()
+        self.writes = 0
+
+    def writable(self):
+        return True
+
+    def write(self, contents):
+        self.writes += 1
+        self.data += contents
+        return len(contents)
+
+
+@mock.patch("tentaclio.clients.GSClient._connect")
+def test_helper_get_raw_writer(m_connect):
+    """Test raw writers are buffered and left open."""
+    writer = RawWriter()
+    blob = m_connect.return_value.bucket.return_value.blob.return_value
+
+    def download(f):
+        for _ in range(10):
+            f.write(b"hello")
+
+    blob.download_to_file.side_effect = download
+    with gs_client.GSClient("gs://bucket/prefix") as client:
+        client._get(writer, bucket_name="bucket", key_name="prefix")
+
+    assert isinstance(blob.download_to_file.call_args[0][0], io.BufferedWriter)
+    assert bytes(writer.data) == b"hello" * 10
+    assert writer.writes == 1
+    assert not writer.closed
+
+
+@mock.patch("tentaclio.clients.GSClient._connect")
+def test_helper_put_raw_reader(m_connect):
+    """Test raw readers are buffered and left open."""
+    reader = io.FileIO(__file__, "r")
+    blob = m_connect.return_value.bucket.return_value.blob.return_value
+    blob.upload_from_file.side_effect = lambda f, size: f.read()
+
+    with gs_client.GSClient("gs://bucket/prefix") as client:
+        client._put(reader, bucket_name="bucket", key_name="prefix")
+
+    assert isinstance(blob.upload_from_file.call_args[0][0], io.BufferedReader)
+    assert blob.upload_from_file.call_args[1]["size"] == os.path.getsize(__file__)
+    assert not reader.closed
+    reader.close()
+
+
 @mock.patch("tentaclio.clients.GSClient._connect")
 @pytest.mark.parametrize(
     "url,bucket,key", [
@@ -196,3 +273,69 @@ def test_helper_remove(m_connect, url, bucket, key):
     connection.bucket.assert_called_once_with(bucket)
     connection.bucket.return_value.blob.assert_called_once_with(key)
     connection.bucket.return_value.blob.return_value.delete.assert_called_once()
+
+
+@mock.patch("tentaclio.clients.gs_client.storage.Client")
+def test_storage_client_shared(m_storage_client):
+    """Test the storage client is reused across clients."""
+    with mock.patch.dict(gs_client._GS_CLIENT_CACHE, clear=True):
+        with gs_client.GSClient("gs://bucket/one") as client_one:
+            pass
+        with gs_client.GSClient("gs://bucket/two") as client_two:
+            pass
+
+    m_storage_client.assert_called_once_with()
+    assert client_one.conn is client_two.conn
+
+
+@mock.patch("tentaclio.clients.gs_client.storage.Client")
+def test_storage_client_per_environment(m_storage_client):
+    """Test a new storage client is created when the credentials environment changes."""
+    with mock.patch.dict(gs_client._GS_CLIENT_CACHE, clear=True):
+        with mock.patch.dict("os.environ", {"GOOGLE_CLOUD_PROJECT": "one"}):
+            gs_client._get_storage_client()
+        with mock.patch.dict("os.environ", {"GOOGLE_CLOUD_PROJECT": "two"}):
+            gs_client._get_storage_client()
+
+    assert m_storage_client.call_count == 2
+
+
+@mock.patch("tentaclio.clients.gs_client.storage.Client")
+def test_storage_client_created_once_across_threads(m_storage_client):
+    """Test concurrent first uses resolve the credentials only once."""
+
+    def slow_client():
+        time.sleep(0.01)
+        return mock.MagicMock()
+
+    m_storage_client.side_effect = slow_client
+    with mock.patch.dict(gs_client._GS_CLIENT_CACHE, clear=True):
+        with futures.ThreadPoolExecutor(max_workers=4) as executor:
+            clients = list(executor.map(lambda _: gs_client._get_storage_client(), range(4)))
+
+    m_storage_client.assert_called_once_with()
+    assert all(client is clients[0] for client in clients)
+
+
+@mock.patch("tentaclio.clients.gs_client.storage.Client")
+def test_storage_client_connection_pool(m_storage_client):
+    """Test the storage client session can keep a connection open per thread."""
+    session = m_storage_client.return_value._http
+    session.is_mtls = False
+
+    gs_client._create_storage_client()
+
+    url, adapter = session.mount.call_args[0]
+    assert url == "https://"
+    assert adapter._pool_maxsize == gs_client.HTTP_POOL_SIZE
+
+
+@mock.patch("tentaclio.clients.gs_client.storage.Client")
+def test_storage_client_connection_pool_mtls(m_storage_client):
+    """Test the mutual tls adapter is left in place."""
+    session = m_storage_client.return_value._http
+    session.is_mtls = True
+
+    gs_client._create_storage_client()
+
+    session.mount.assert_not_called()
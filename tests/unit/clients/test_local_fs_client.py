@@ -1,4 +1,6 @@
 import collections
+import io
+import tempfile
 
 from tentaclio import URL
 from tentaclio.clients.local_fs_client import LocalFSClient
@@ -34,3 +36,22 @@ class TestLocalFileScanner(object):
             assert entry.url == expected.url
             assert entry.is_dir == expected.is_dir
             assert entry.is_file == expected.is_file
+
+
+class TestLocalFSClientStreams(object):
+    def test_size(self):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b"hello")
+            f.flush()
+            assert LocalFSClient(f.name).size == 5
+
+    def test_size_not_found(self):
+        assert LocalFSClient("/not/a/file").size is None
+
+    def test_get(self):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b"hello")
+            f.flush()
+            writer = io.BytesIO()
+            LocalFSClient(f.name).get(writer)
+            assert writer.getvalue() == b"hello"
@@ -1,8 +1,30 @@
 import io
 
+import pytest
+
 from tentaclio.streams import base_stream
 
 
+@pytest.mark.parametrize("buffer_size", (1, 3, 1024))
+def test_copy_stream_bytes(buffer_size):
+    contents = bytes("hello world", "utf-8")
+    writer = io.BytesIO()
+
+    copied = base_stream.copy_stream(io.BytesIO(contents), writer, buffer_size=buffer_size)
+
+    assert copied == len(contents)
+    assert writer.getvalue() == contents
+
+
+def test_copy_stream_text():
+    writer = io.StringIO()
+
+    copied = base_stream.copy_stream(io.StringIO("hello world"), writer, buffer_size=4)
+
+    assert copied == len("hello world")
+    assert writer.getvalue() == "hello world"
+
+
 class TestStreamerWriter:
     def test_write(self, mocker):
         client = mocker.MagicMock()
@@ -43,6 +65,26 @@ class TestStreamerReader:
         contents = reader.readline()
         assert expected == contents
 
+    @pytest.mark.parametrize("size", (5, 11, 20))
+    def test_read_preallocated(self, mocker, size):
+        client = mocker.MagicMock()
+        expected = bytes("hello world", "utf-8")
+        client.get = lambda f: f.write(expected)
+        client.size = size
+
+        reader = base_stream.StreamerReader(client, io.BytesIO())
+        assert expected == reader.read()
+
+    def test_copy_to(self, mocker):
+        client = mocker.MagicMock()
+        expected = bytes("hello world", "utf-8")
+        client.get = lambda f: f.write(expected)
+
+        reader = base_stream.StreamerReader(client, io.BytesIO())
+        writer = io.BytesIO()
+        reader.copy_to(writer, buffer_size=4)
+        assert expected == writer.getvalue()
+
     def test_close(self, mocker):
         client = mocker.MagicMock()
 
@@ -56,3 +98,14 @@ class TestStreamerReader:
 
         reader = base_stream.StreamerReader(client, io.BytesIO())
         assert reader.seekable()
+
+
+class TestStringToBytesClientReader:
+    @pytest.mark.parametrize("size", (None, 5, 20))
+    def test_read(self, mocker, size):
+        client = mocker.MagicMock()
+        client.get = lambda f: f.write(bytes("hello world", "utf-8"))
+        client.size = size
+
+        reader = base_stream.StringToBytesClientReader(client)
+        assert "hello world" == reader.read()
@@ -1,8 +1,12 @@
 import io
+import shutil
+
+import pytest
 
 from tentaclio import URL, Reader, Writer
 from tentaclio.clients import base_client
 from tentaclio.streams import StreamURLHandler
+from tentaclio.streams.stream_client_handler import _is_bytes_mode
 
 
 class FakeClient(base_client.BaseClient["FakeClient"]):
@@ -20,7 +24,7 @@ class FakeClient(base_client.BaseClient["FakeClient"]):
         writer.write(self._message)
 
     def put(self, reader: Reader, **params) -> None:
-        self._writer.write(reader.read())
+        shutil.copyfileobj(reader, self._writer)
         self._writer.seek(0)
 
 
@@ -37,6 +41,55 @@ def test_open_reader_for_bytes():
     assert message == reader.read()
 
 
+def test_open_reader_for_bytes_not_decoded():
+    handler = StreamURLHandler(FakeClient)
+    reader = handler.open_reader_for(URL("scheme://my/path"), mode="rb", extras={})
+    assert isinstance(reader.buffer, io.BytesIO)
+
+
+def test_open_reader_for_string_wraps_client_buffer():
+    handler = StreamURLHandler(FakeClient)
+    reader = handler.open_reader_for(URL("scheme://my/path"), mode="t", extras={})
+    # the text is decoded straight from the bytes written by the client
+    assert isinstance(reader.buffer, io.TextIOWrapper)
+    assert reader.buffer.buffer is reader.inner_buffer
+    assert reader.inner_buffer.getvalue() == bytes("hello", "utf-8")
+
+
+def test_open_reader_for_sized_client():
+    class SizedClient(FakeClient):
+        size = 100
+
+    handler = StreamURLHandler(SizedClient)
+    reader = handler.open_reader_for(URL("scheme://my/path"), mode="b", extras={})
+    assert reader.read() == bytes("hello", "utf-8")
+
+
+def test_open_reader_for_size_probed_when_connected():
+    probes = []
+
+    class SizedClient(FakeClient):
+        @property
+        def size(self):
+            probes.append(self.closed)
+            return 100
+
+    handler = StreamURLHandler(SizedClient)
+    reader = handler.open_reader_for(URL("scheme://my/path"), mode="b", extras={})
+
+    assert reader.read() == bytes("hello", "utf-8")
+    # asked only once, inside the client context
+    assert probes == [False]
+
+
+def test_open_reader_for_copy_to():
+    handler = StreamURLHandler(FakeClient)
+    reader = handler.open_reader_for(URL("scheme://my/path"), mode="b", extras={})
+    writer = io.BytesIO()
+    reader.copy_to(writer)
+    assert writer.getvalue() == bytes("hello", "utf-8")
+
+
 def test_open_writer_for_string():
     url = URL("scheme://my/path")
     client = FakeClient(url)
@@ -48,6 +101,22 @@ def test_open_writer_for_string():
     assert client._writer.getvalue().decode("utf-8") == "test"
 
 
+def test_open_writer_for_string_single_put(mocker):
+    url = URL("scheme://my/path")
+    client = FakeClient(url)
+    put = mocker.spy(client, "put")
+    handler = StreamURLHandler(lambda url, **kwargs: client)
+    writer = handler.open_writer_for(url, mode="t", extras={})
+    for _ in range(3):
+        writer.write("test")
+    writer.close()
+
+    put.assert_called_once()
+    # the encoded bytes are handed over as they are, without copying them to a new buffer
+    assert put.call_args[0][0] is writer.inner_buffer
+    assert client._writer.getvalue().decode("utf-8") == "testtesttest"
+
+
 def test_open_writer_for_bytes():
     url = URL("scheme://my/path")
     client = FakeClient(url)
@@ -59,3 +128,11 @@ def test_open_writer_for_bytes():
     writer.close()
 
     assert client._writer.getvalue() == message
+
+
+@pytest.mark.parametrize(
+    "mode, expected",
+    [("rb", True), ("w+b", True), ("b", True), ("r", False), ("t", False), ("w+", False)],
+)
+def test_is_bytes_mode(mode, expected):
+    assert _is_bytes_mode(mode) is expected